@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 """Module providing support for Royal Render."""
 import os
+import sys
+import time
 
-from ayon_core.addon import AYONAddon, IPluginPaths
+from ayon_core.addon import AYONAddon, IPluginPaths, click_wrap
 
 from .version import __version__
 
@@ -31,3 +33,55 @@ class RoyalRenderAddon(AYONAddon, IPluginPaths):
         return {
             "publish": [os.path.join(current_dir, "plugins", "publish")]
         }
+
+    def cli(self, click_group):
+        click_group.add_command(cli_main.to_click_obj())
+
+
+@click_wrap.group(
+    RoyalRenderAddon.name,
+    help="RoyalRender command line tools."
+)
+def cli_main():
+    pass
+
+
+@cli_main.command(
+    "flush-spool",
+    help="Submit spooled submissions once RoyalRender root is reachable."
+)
+@click_wrap.option(
+    "--batch-size",
+    type=int,
+    default=None,
+    help="Maximal number of submissions submitted in one pass."
+)
+@click_wrap.option(
+    "--interval",
+    type=float,
+    default=0,
+    help="Repeat every N seconds until the spool is empty."
+)
+@click_wrap.option(
+    "--spool-dir",
+    default=None,
+    help="Spool directory, local AYON launcher directory by default."
+)
+def flush_spool(batch_size, interval, spool_dir):
+    from .spool import SpoolLockedError, SubmissionSpool
+
+    spool = SubmissionSpool(spool_dir)
+    while True:
+        try:
+            submitted = spool.flush(batch_size=batch_size)
+        except SpoolLockedError:
+            print(
+                "Spool '{}' is being flushed by other process.".format(
+                    spool.directory))
+            sys.exit(1)
+        remaining = len(spool.get_entries())
+        print("Submitted {} submission(s), {} remaining.".format(
+            len(submitted), remaining))
+        if not remaining or interval <= 0:
+            break
+        time.sleep(interval)
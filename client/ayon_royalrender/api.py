@@ -2,13 +2,74 @@
 """Wrapper around Royal Render API."""
 import os
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor  # noqa: F401
+from typing import Optional, Union  # noqa: F401
 
-from ayon_core.lib import Logger, run_subprocess, AYONSettingsRegistry
+from ayon_core.lib import Logger, run_subprocess
 from ayon_core.lib.vendor_bin_utils import find_tool_in_custom_paths
 
 from .rr_job import SubmitFile
 from .rr_job import RRJob, SubmitterParameter # noqa F401
 
+# Seconds for which paths resolved on RoyalRender root are trusted
+# without touching the share again.
+PATH_CACHE_TTL = 300
+
+# (root, platform, tool) -> (tool path, mtimes of checked dirs, checked at)
+_tool_path_cache = {}
+# existing path -> checked at
+_path_exists_cache = {}
+_path_cache_lock = threading.Lock()
+
+
+def _get_mtime(path):
+    # type: (str) -> Optional[float]
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def path_exists(path, ttl=PATH_CACHE_TTL):
+    # type: (str, float) -> bool
+    """Check if path exists, existing path is cached for `ttl` seconds.
+
+    Missing path is checked again every time, so root which comes back
+    online is used right away.
+
+    Args:
+        path (str): Path to check, usually RoyalRender root.
+        ttl (float): Seconds for which result is reused.
+
+    Returns:
+        bool: Path exists.
+
+    """
+    now = time.monotonic()
+    with _path_cache_lock:
+        checked = _path_exists_cache.get(path)
+    if checked is not None and now - checked < ttl:
+        return True
+
+    exists = os.path.exists(path)
+    with _path_cache_lock:
+        if exists:
+            _path_exists_cache[path] = now
+        else:
+            _path_exists_cache.pop(path, None)
+    return exists
+
+
+def clear_path_cache():
+    # type: () -> None
+    """Forget all cached paths on RoyalRender roots."""
+    with _path_cache_lock:
+        _tool_path_cache.clear()
+        _path_exists_cache.clear()
+
 
 class Api:
 
@@ -16,16 +77,31 @@ class Api:
     RR_SUBMIT_CONSOLE = 1
     RR_SUBMIT_API = 2
 
+    # Number of files submitted in background at the same time
+    async_workers = 4
+    _executor = None
+    _executor_lock = threading.Lock()
+
     def __init__(self, rr_path=None):
+        # type: (str) -> None
         self.log = Logger.get_logger("RoyalRender")
         self._rr_path = rr_path
-        os.environ["RR_ROOT"] = rr_path
+
+    @property
+    def rr_path(self):
+        # type: () -> str
+        """RoyalRender root of this API."""
+        return self._rr_path
 
     @staticmethod
     def get_rr_bin_path(rr_root, tool_name=None):
         # type: (str, str) -> str
         """Get path to RR bin folder.
 
+        Resolved tool paths are cached per root, platform and tool. Cache
+        is trusted for `PATH_CACHE_TTL` seconds, after that it is reused
+        while modification times of bin folders are the same.
+
         Args:
             tool_name (str): Name of RR executable you want.
             rr_root (str): Custom RR root if needed.
@@ -60,25 +136,40 @@ class Api:
             return rr_bin_path
         paths_to_check.append(rr_bin_path)
 
-        return find_tool_in_custom_paths(paths_to_check, tool_name)
+        key = (rr_root, sys.platform, tool_name)
+        now = time.monotonic()
+        with _path_cache_lock:
+            cached = _tool_path_cache.get(key)
+        if cached is not None:
+            tool_path, mtimes, checked = cached
+            if now - checked < PATH_CACHE_TTL:
+                return tool_path
+            if [_get_mtime(path) for path in paths_to_check] == mtimes:
+                with _path_cache_lock:
+                    _tool_path_cache[key] = (tool_path, mtimes, now)
+                return tool_path
+
+        mtimes = [_get_mtime(path) for path in paths_to_check]
+        tool_path = find_tool_in_custom_paths(paths_to_check, tool_name)
+        with _path_cache_lock:
+            _tool_path_cache[key] = (tool_path, mtimes, now)
+        return tool_path
 
     def _initialize_module_path(self):
         # type: () -> None
         """Set RR modules for Python."""
-        # default for linux
         rr_bin = self.get_rr_bin_path(self._rr_path)
-        rr_module_path = os.path.join(rr_bin, "lx64/lib")
+        # default for linux, e.g. `<root>/bin/lx64/lib`
+        rr_module_path = os.path.join(rr_bin, "lib")
 
         if sys.platform.lower() == "win32":
-            rr_module_path = rr_bin
-            rr_module_path = rr_module_path.replace(
-                "/", os.path.sep
-            )
+            rr_module_path = rr_bin.replace("/", os.path.sep)
 
         if sys.platform.lower() == "darwin":
             rr_module_path = os.path.join(rr_bin, "lib/python/27")
 
-        sys.path.append(os.path.join(self._rr_path, rr_module_path))
+        if rr_module_path not in sys.path:
+            sys.path.append(rr_module_path)
 
     @staticmethod
     def create_submission(jobs, submitter_attributes):
@@ -97,16 +188,64 @@ class Api:
         return SubmitFile(SubmitterParameters=submitter_attributes, Jobs=jobs)
 
     def submit_file(self, file, mode=RR_SUBMIT_CONSOLE):
-        # type: (SubmitFile, int) -> None
+        # type: (Union[str, SubmitFile], int) -> None
+        """Submit jobs to RoyalRender.
+
+        Args:
+            file (Union[str, SubmitFile]): Path to submission file or
+                submission itself.
+            mode (int): Submit using `rrSubmitterconsole`, submission
+                through RR API is not supported.
+
+        """
         if mode == self.RR_SUBMIT_CONSOLE:
+            if isinstance(file, SubmitFile):
+                file = self._write_submission_file(file)
             self._submit_using_console(file)
             return
 
-        # RR v7 supports only Python 2.7, so we bail out in fear
-        # until there is support for Python 3 😰
+        # Mapping of jobs to RR Python SDK is not verified and jobs can't
+        # be sent in one batch, PreID links between them wouldn't hold.
         raise NotImplementedError(
             "Submission via RoyalRender API is not supported yet")
-        # self._submit_using_api(file)
+
+    @staticmethod
+    def _write_submission_file(submission):
+        # type: (SubmitFile) -> str
+        # file is closed before it is passed to `rrSubmitterconsole`
+        handle, path = tempfile.mkstemp(suffix=".xml")
+        with os.fdopen(handle, "w") as stream:
+            submission.write(stream)
+        return path
+
+    def submit_file_async(self, file, mode=RR_SUBMIT_CONSOLE):
+        # type: (Union[str, SubmitFile], int) -> Future
+        """Submit file in background thread.
+
+        Submission keeps running when caller stops waiting for it, result
+        is available on returned future.
+
+        Args:
+            file (Union[str, SubmitFile]): Path to submission file or
+                submission itself.
+            mode (int): Submission mode.
+
+        Returns:
+            Future: Future resolved when file is submitted.
+
+        """
+        return self._get_executor().submit(self.submit_file, file, mode)
+
+    @classmethod
+    def _get_executor(cls):
+        # type: () -> ThreadPoolExecutor
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=cls.async_workers,
+                    thread_name_prefix="RoyalRenderSubmit"
+                )
+            return cls._executor
 
     def _submit_using_console(self, job_file):
         # type: (SubmitFile) -> None
@@ -117,64 +256,11 @@ class Api:
 
         args = [rr_start_local, "rrSubmitterconsole", job_file]
         self.log.info("Executing: {}".format(" ".join(args)))
-        env = os.environ
+        # copy so concurrent submissions to other roots are not affected
+        env = os.environ.copy()
         env["RR_ROOT"] = self._rr_path
         run_subprocess(args, logger=self.log, env=env)
 
-    def _submit_using_api(self, file):
-        # type: (SubmitFile) -> None
-        """Use RR API to submit jobs.
-
-        Args:
-            file (SubmitFile): Submit jobs definition.
-
-        Throws:
-            RoyalRenderException: When something fails.
-
-        """
-        self._initialize_module_path()
-        import libpyRR2 as rrLib  # noqa
-        from rrJob import getClass_JobBasics  # noqa
-        import libpyRR2 as _RenderAppBasic  # noqa
-
-        tcp = rrLib._rrTCP("")  # noqa
-        rr_server = tcp.getRRServer()
-
-        if len(rr_server) == 0:
-            self.log.info("Got RR IP address {}".format(rr_server))
-
-        # TODO: Port is hardcoded in RR? If not, move it to Settings
-        if not tcp.setServer(rr_server, 7773):
-            self.log.error(
-                "Can not set RR server: {}".format(tcp.errorMessage()))
-            raise RoyalRenderException(tcp.errorMessage())
-
-        # TODO: This need UI and better handling of username/password.
-        # We can't store password in keychain as it is pulled multiple
-        # times and users on linux must enter keychain password every time.
-        # Probably best way until we setup our own user management would be
-        # to encrypt password and save it to json locally. Not bulletproof
-        # but at least it is not stored in plaintext.
-        reg = AYONSettingsRegistry("rr_settings")
-        try:
-            rr_user = reg.get_item("rr_username")
-            rr_password = reg.get_item("rr_password")
-        except ValueError:
-            # user has no rr credentials set
-            pass
-        else:
-            # login to RR
-            tcp.setLogin(rr_user, rr_password)
-
-        job = getClass_JobBasics()
-        renderer = _RenderAppBasic()
-
-        # iterate over SubmitFile, set _JobBasic (job) and renderer
-        # and feed it to jobSubmitNew()
-        # not implemented yet
-        job.renderer = renderer
-        tcp.jobSubmitNew(job)
-
 
 class RoyalRenderException(Exception):
     """Exception used in various error states coming from RR."""
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""Environment files shared by jobs of one submission.
+
+Each job carries its environment in `rrEnvList` which RoyalRender limits
+to 2000 characters. Variables with the same value on all jobs of the
+submission are written once to environment file which the jobs point to
+with `rrEnvFile`, only the differences are kept on the jobs.
+"""
+import hashlib
+import json
+import os
+import platform
+import shlex
+
+from .rr_job import RREnvList, RRJob  # noqa: F401
+
+# Longer `rrEnvList` is truncated by RoyalRender.
+MAX_ENV_LIST_LENGTH = 2000
+
+# Variables read from `rrEnvList` by `ayon_inject_envvar.py` on render
+# clients, they always stay on the job.
+INLINE_ENV_KEYS = {
+    "AYON_RENDER_JOB",
+    "AYON_PUBLISH_JOB",
+    "AYON_REMOTE_PUBLISH",
+    "AYON_PROJECT_NAME",
+    "AYON_FOLDER_PATH",
+    "AYON_TASK_NAME",
+    "AYON_APP_NAME",
+    "AYON_BUNDLE_NAME",
+    "AYON_RR_FARM_ENV_FILE",
+    "AYON_RR_MIN_GPUS",
+    # `<GpuListC>` is resolved by RoyalRender per render instance
+    "CUDA_VISIBLE_DEVICES",
+}
+
+# Variable with path to farm environment resolved at submission
+FARM_ENV_FILE_KEY = "AYON_RR_FARM_ENV_FILE"
+# Variable with minimal amount of GPUs of render client
+MIN_GPUS_ENV_KEY = "AYON_RR_MIN_GPUS"
+
+
+def write_env_file(directory, env, prefix="rrEnv"):
+    # type: (str, dict, str) -> str
+    """Write environment file for all platforms.
+
+    Files are named by hash of their content, existing file with the same
+    content is reused. Both `.bat` and `.sh` files are written,
+    RoyalRender picks the one for platform of the client from `.allos`.
+
+    Args:
+        directory (str): Directory to write files to.
+        env (dict): Environment variables.
+        prefix (str): Prefix of the file name.
+
+    Returns:
+        str: Path to `.allos` file to be used as `rrEnvFile`.
+
+    """
+    items = sorted(env.items())
+    bat_content = "".join(
+        'set "{}={}"\n'.format(key, value) for key, value in items)
+    sh_content = "".join(
+        "export {}={}\n".format(key, shlex.quote(value))
+        for key, value in items
+    )
+    content_hash = hashlib.sha1(
+        (bat_content + sh_content).encode("utf-8")).hexdigest()[:12]
+    base_path = "{}/{}_{}".format(
+        directory.replace("\\", "/"), prefix, content_hash)
+
+    os.makedirs(directory, exist_ok=True)
+    for ext, content in (("bat", bat_content), ("sh", sh_content)):
+        path = "{}.{}".format(base_path, ext)
+        if os.path.exists(path):
+            continue
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, "w") as stream:
+            stream.write(content)
+        os.replace(tmp_path, path)
+
+    return "{}.allos".format(base_path)
+
+
+def write_farm_env_file(directory, env, bundle_name):
+    # type: (str, dict, str) -> str
+    """Write farm environment resolved at submission for render clients.
+
+    Render clients use it instead of extracting the environment when
+    it was resolved for the same platform and is not too old. Bundle is
+    stored for information. File named by hash
+    of its content is reused, its modification time is refreshed.
+
+    Args:
+        directory (str): Directory accessible from render clients.
+        env (dict): Resolved environment.
+        bundle_name (str): Bundle the environment was resolved with.
+
+    Returns:
+        str: Path to the file.
+
+    """
+    content = json.dumps(
+        {
+            "bundle": bundle_name,
+            "platform": platform.system().lower(),
+            "env": env,
+        },
+        sort_keys=True,
+        indent=4,
+    )
+    content_hash = hashlib.sha1(content.encode("utf-8")).hexdigest()[:12]
+    path = "{}/ayon_farm_env_{}.json".format(
+        directory.replace("\\", "/"), content_hash)
+
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "w") as stream:
+        stream.write(content)
+    os.replace(tmp_path, path)
+    return path
+
+
+def share_job_environments(jobs, directory, limit=MAX_ENV_LIST_LENGTH):
+    # type: (list[RRJob], str, int) -> list[RRJob]
+    """Move environment shared by jobs to one environment file.
+
+    Variables with the same value on all jobs are written to environment
+    file in `directory` which is set as `rrEnvFile` of the jobs. Jobs
+    which would still exceed `limit` get all their variables written to
+    their own environment file.
+
+    Jobs that already have `rrEnvFile` are not changed.
+
+    Args:
+        jobs (list[RRJob]): Jobs of the submission.
+        directory (str): Directory accessible from render clients.
+        limit (int): Maximal length of `rrEnvList`.
+
+    Returns:
+        list[RRJob]: Jobs which still exceed the limit.
+
+    """
+    env_jobs = [job for job in jobs if job.rrEnvList and not job.rrEnvFile]
+
+    shared = {}
+    if len(env_jobs) > 1:
+        shared_items = set(env_jobs[0].rrEnvList.items())
+        for job in env_jobs[1:]:
+            shared_items.intersection_update(job.rrEnvList.items())
+        shared = {
+            key: value
+            for key, value in shared_items
+            if key not in INLINE_ENV_KEYS
+        }
+
+    shared_path = None
+    if shared:
+        shared_path = write_env_file(directory, shared, "rrEnv_shared")
+
+    over_limit = []
+    for job in env_jobs:
+        env = job.rrEnvList
+        inline = _filter_env(env, lambda key: key not in shared)
+        env_path = shared_path
+        if len(inline.serialize()) > limit:
+            # spill over all variables not read by render client
+            inline = _filter_env(env, lambda key: key in INLINE_ENV_KEYS)
+            env_path = write_env_file(
+                directory,
+                {
+                    key: value
+                    for key, value in env.items()
+                    if key not in INLINE_ENV_KEYS
+                },
+                "rrEnv_job"
+            )
+            if len(inline.serialize()) > limit:
+                over_limit.append(job)
+
+        job.rrEnvList = inline
+        job.rrEnvFile = env_path
+    return over_limit
+
+
+def _filter_env(env, predicate):
+    # type: (RREnvList, callable) -> RREnvList
+    """Copy of environment with variables matching predicate only."""
+    out = RREnvList(
+        (key, value) for key, value in env.items() if predicate(key)
+    )
+    out.commands = list(env.commands)
+    return out
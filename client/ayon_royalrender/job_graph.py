@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""Dependencies between jobs submitted to RoyalRender together."""
+from collections import OrderedDict
+
+from .rr_job import RRJob  # noqa: F401
+
+# PreID is a value between 0 and 255.
+MAX_PRE_ID = 255
+
+
+class JobGraphError(Exception):
+    """Dependencies of jobs can't be resolved."""
+    pass
+
+
+class JobGraph:
+    """Dependency graph of jobs in one submission.
+
+    Jobs declare only jobs they really wait for
+    (:meth:`RRJob.add_dependencies`). Graph sorts them to levels where
+    each job depends only on jobs from previous levels, so all jobs on one
+    level can be rendered in parallel.
+
+    Args:
+        jobs (list[RRJob]): Jobs of the submission.
+
+    Raises:
+        JobGraphError: When some job depends on job outside of `jobs`.
+
+    """
+    def __init__(self, jobs):
+        # type: (list[RRJob]) -> None
+        self._jobs = OrderedDict()
+        for job in jobs:
+            self._jobs.setdefault(id(job), job)
+
+        for job in self._jobs.values():
+            for dependency in job.dependencies:
+                if id(dependency) not in self._jobs:
+                    raise JobGraphError(
+                        "Job '{}' depends on job '{}' which is not part "
+                        "of the submission.".format(
+                            _get_job_label(job), _get_job_label(dependency)
+                        )
+                    )
+
+    @property
+    def jobs(self):
+        # type: () -> list[RRJob]
+        return list(self._jobs.values())
+
+    def get_levels(self):
+        # type: () -> list[list[RRJob]]
+        """Sort jobs topologically to levels of independent jobs.
+
+        Order of jobs on each level is the order they were passed in.
+
+        Returns:
+            list[list[RRJob]]: Jobs by level.
+
+        Raises:
+            JobGraphError: When dependencies contain cycle.
+
+        """
+        remaining = OrderedDict(
+            (job_id, {id(dependency) for dependency in job.dependencies})
+            for job_id, job in self._jobs.items()
+        )
+        levels = []
+        while remaining:
+            level = [
+                job_id
+                for job_id, dependencies in remaining.items()
+                if not dependencies
+            ]
+            if not level:
+                raise JobGraphError(
+                    "Jobs have cyclic dependencies: {}".format(", ".join(
+                        _get_job_label(self._jobs[job_id])
+                        for job_id in remaining
+                    ))
+                )
+            for job_id in level:
+                remaining.pop(job_id)
+            for dependencies in remaining.values():
+                dependencies.difference_update(level)
+            levels.append([self._jobs[job_id] for job_id in level])
+        return levels
+
+    def get_components(self):
+        # type: () -> list[list[RRJob]]
+        """Split jobs to groups connected by dependencies.
+
+        Jobs from different groups don't wait for each other, so each
+        group can be submitted separately.
+
+        Returns:
+            list[list[RRJob]]: Groups in order of their first job.
+
+        """
+        parents = {job_id: job_id for job_id in self._jobs}
+
+        def _find(job_id):
+            while parents[job_id] != job_id:
+                parents[job_id] = parents[parents[job_id]]
+                job_id = parents[job_id]
+            return job_id
+
+        for job_id, job in self._jobs.items():
+            for dependency in job.dependencies:
+                root, dependency_root = _find(job_id), _find(id(dependency))
+                if root != dependency_root:
+                    parents[dependency_root] = root
+
+        components = OrderedDict()
+        for job_id, job in self._jobs.items():
+            components.setdefault(_find(job_id), []).append(job)
+        return list(components.values())
+
+    def split(self, max_jobs):
+        # type: (int) -> list[list[RRJob]]
+        """Split jobs to batches which can be submitted separately.
+
+        Groups of connected jobs are never split, group bigger than
+        `max_jobs` is a batch on its own.
+
+        Args:
+            max_jobs (int): Maximal number of jobs in one batch, it is
+                limited to number of available PreIDs.
+
+        Returns:
+            list[list[RRJob]]: Batches of jobs.
+
+        """
+        max_jobs = min(max(max_jobs, 1), MAX_PRE_ID + 1)
+        batches = []
+        batch = []
+        for component in self.get_components():
+            if batch and len(batch) + len(component) > max_jobs:
+                batches.append(batch)
+                batch = []
+            batch.extend(component)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def assign_pre_ids(self, start=0):
+        # type: (int) -> list[RRJob]
+        """Set `PreID` and `WaitForPreIDs` on all jobs.
+
+        PreIDs are assigned in topological order, so every job is
+        submitted after all jobs it waits for.
+
+        Args:
+            start (int): First assigned PreID.
+
+        Returns:
+            list[RRJob]: Jobs in order they should be submitted.
+
+        Raises:
+            JobGraphError: When there are more jobs than available PreIDs
+                or dependencies contain cycle.
+
+        """
+        available = MAX_PRE_ID + 1 - start
+        if len(self._jobs) > available:
+            raise JobGraphError(
+                "Submission contains {} jobs but only {} can be submitted "
+                "together.".format(len(self._jobs), available)
+            )
+
+        ordered = [job for level in self.get_levels() for job in level]
+        pre_ids = {}
+        for pre_id, job in enumerate(ordered, start):
+            job.PreID = pre_id
+            pre_ids[id(job)] = pre_id
+
+        for job in ordered:
+            for dependency in job.dependencies:
+                pre_id = pre_ids[id(dependency)]
+                if pre_id not in job.WaitForPreIDs:
+                    job.WaitForPreIDs.append(pre_id)
+        return ordered
+
+
+def assign_batch_pre_ids(batches):
+    # type: (list[list[RRJob]]) -> list[list[list[RRJob]]]
+    """Set PreIDs of batches submitted from this machine together.
+
+    RoyalRender looks for jobs to wait for among jobs sent from the same
+    machine with the same main ID, which changes only every 5/1000s (see
+    `RRJob.PreID`). Batches submitted in parallel could get the same
+    main ID, so they must not share PreIDs. PreIDs continue from batch to
+    batch, batches which don't fit to the remaining PreIDs start next
+    round. Rounds must be submitted one after another.
+
+    Args:
+        batches (list[list[RRJob]]): Batches from :meth:`JobGraph.split`.
+
+    Returns:
+        list[list[list[RRJob]]]: Rounds of batches, jobs of each batch in
+            order they should be submitted.
+
+    Raises:
+        JobGraphError: When batch has more jobs than available PreIDs or
+            dependencies contain cycle.
+
+    """
+    rounds = []
+    current = []
+    start = 0
+    for batch in batches:
+        if current and start + len(batch) > MAX_PRE_ID + 1:
+            rounds.append(current)
+            current = []
+            start = 0
+        current.append(JobGraph(batch).assign_pre_ids(start))
+        start += len(batch)
+    if current:
+        rounds.append(current)
+    return rounds
+
+
+def _get_job_label(job):
+    # type: (RRJob) -> str
+    return job.CustomSHotName or job.SceneName
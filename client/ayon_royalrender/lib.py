@@ -1,29 +1,41 @@
 # -*- coding: utf-8 -*-
 """Submitting render job to RoyalRender."""
+import json
+import math
 import os
-import re
 from datetime import datetime
 from enum import Enum
 from typing import Optional, Any, Dict
 
+import attr
 import pyblish.api
 
 from ayon_core.lib import (
     BoolDef,
     NumberDef,
+    get_ayon_launcher_version,
     is_in_tests,
 )
 from ayon_royalrender.api import Api as rrApi
+from ayon_royalrender.env_file import (
+    FARM_ENV_FILE_KEY,
+    MIN_GPUS_ENV_KEY,
+    write_farm_env_file,
+)
 from ayon_royalrender.rr_job import (
     RREnvList,
     RRJob,
     SubmitterParameter,
     get_rr_platform,
 )
+from ayon_royalrender.sequence import FrameSequence, get_path_template
 from ayon_core.pipeline import AYONPyblishPluginMixin
 from ayon_core.pipeline.publish import KnownPublishError
 from ayon_core.pipeline.publish.lib import get_published_workfile_instance
 
+# Instance data key with `FrameSequence` objects rendered by RR jobs
+EXPECTED_SEQUENCES_KEY = "rrExpectedSequences"
+
 
 class BaseCreateRoyalRenderJob(
     pyblish.api.InstancePlugin, AYONPyblishPluginMixin
@@ -36,13 +48,36 @@ class BaseCreateRoyalRenderJob(
     families = ["render", "prerender"]
     targets = ["local"]
     optional = True
+    settings_category = "royalrender"
 
     priority = 50
     chunk_size = 1
+    # used when artist sets "Frames Per Task" to 0 (auto), clients are
+    # a static estimate, free clients of the farm are not queried
+    auto_chunk_clients = 10
+    auto_chunk_min_size = 1
+    auto_chunk_max_size = 100
     concurrent_tasks = 1
-    use_gpu = True
+    # cores of render client split between concurrent render instances,
+    # 0 keeps thread count on render application
+    cores_per_client = 0
+    # jobs are routed to GPU client group, CPU only by default so jobs
+    # like Nuke comps don't wait for GPU clients
+    use_gpu = False
+    # minimal amount of GPUs of render client, checked by
+    # `ayon_inject_envvar.py` on the client, 0 doesn't check it
+    gpu_count = 0
+    # start one render instance per GPU, each gets its GPU as
+    # `CUDA_VISIBLE_DEVICES`
+    split_gpus = False
+    # client groups jobs are sent to, empty to keep RR default
+    gpu_client_group = ""
+    cpu_client_group = ""
     use_published = True
     auto_delete = True
+    # resolve "farm" environment in publishing session and ship it with
+    # render jobs, render clients extract it only when it's missing or stale
+    preresolve_farm_environment = False
 
     @classmethod
     def get_attribute_defs(cls):
@@ -56,9 +91,13 @@ class BaseCreateRoyalRenderJob(
             NumberDef(
                 "chunk",
                 label="Frames Per Task",
+                tooltip=(
+                    "Amount of frames rendered by one task. Use 0 to pick"
+                    " it automatically from frame count."
+                ),
                 default=cls.chunk_size,
                 decimals=0,
-                minimum=1,
+                minimum=0,
                 maximum=1000
             ),
             NumberDef(
@@ -74,6 +113,23 @@ class BaseCreateRoyalRenderJob(
                 default=cls.use_gpu,
                 label="Use GPU"
             ),
+            NumberDef(
+                "gpu_count",
+                label="GPU Count",
+                tooltip=(
+                    "Minimal amount of GPUs of render client, 0 doesn't"
+                    " require any GPU."
+                ),
+                default=cls.gpu_count,
+                decimals=0,
+                minimum=0,
+                maximum=16
+            ),
+            BoolDef(
+                "split_gpus",
+                default=cls.split_gpus,
+                label="One render instance per GPU"
+            ),
             BoolDef(
                 "suspend_publish",
                 default=False,
@@ -130,7 +186,7 @@ class BaseCreateRoyalRenderJob(
                 )
             )
 
-        self.rr_api = rrApi(self._rr_root)
+        self.rr_api = get_rr_api(context, self._rr_root)
 
         self.scene_path = context.data["currentFile"]
         if self.use_published:
@@ -202,23 +258,48 @@ class BaseCreateRoyalRenderJob(
             SubmitterParameter("SendJobDisabled", "1", f"{job_disabled}"),
             SubmitterParameter("Priority", "1", f"{priority}"),
         ]
-
-        # this will append expected files to instance as needed.
+        # movies have to be rendered at once, execute jobs run only once
+        if not single and job_type == "RENDER":
+            submitter_parameters_job.extend(
+                self.get_chunk_parameters(
+                    instance,
+                    start_frame,
+                    end_frame,
+                    int(instance.data.get("byFrameStep", 1))
+                )
+            )
+        if job_type == "RENDER":
+            submitter_parameters_job.extend(
+                self.get_concurrency_parameters(instance))
+            submitter_parameters_job.extend(
+                self.get_gpu_parameters(instance))
+
+        # sequence is expanded to `expectedFiles` only when publish job
+        # needs the paths, see `get_expected_files`
         expected_files = self.expected_files(
             instance, render_path, start_frame, end_frame
         )
-        instance.data["expectedFiles"].extend(expected_files)
+        instance.data.setdefault(
+            EXPECTED_SEQUENCES_KEY, []).append(expected_files)
 
         render_dir = render_dir.replace("\\", "/")
 
-        environment = get_instance_job_envs(instance)
+        environment = RREnvList(get_instance_job_envs(instance))
         environment.update(JobType[job_type].get_job_env())
-        environment = RREnvList(**environment)
-        environment_serialized = environment.serialize()
+        if job_type == "RENDER":
+            environment.update(self.get_gpu_environment(instance))
 
-        exported_env_script_path = f"{render_dir}/rrEnv.allos"
-        environment_serialized += rf'~~~[exec] "<rrLocalBin><OsxApp rrPythonconsole>"  <rrLocalRenderScripts>ayon_inject_envvar.py -jid <JID> {exported_env_script_path}'
-        environment_serialized += rf'~~~[exec] {exported_env_script_path}'
+        if self.preresolve_farm_environment and job_type == "RENDER":
+            farm_env_path = self.write_farm_environment(
+                instance, environment, render_dir)
+            if farm_env_path:
+                environment[FARM_ENV_FILE_KEY] = farm_env_path
+
+        # unique per job, so jobs sharing render dir don't rewrite each
+        # other's file while it is used
+        exported_env_script_path = f"{render_dir}/rrEnv_<JID>.allos"
+        environment.add_command(rf'"<rrLocalBin><OsxApp rrPythonconsole>"  <rrLocalRenderScripts>ayon_inject_envvar.py -jid <JID> {exported_env_script_path}')
+        environment.add_command(exported_env_script_path)
 
         job = RRJob(
             Software="",
@@ -245,11 +326,357 @@ class BaseCreateRoyalRenderJob(
             ImageHeight=instance.data.get("resolutionHeight"),
             CustomAttributes=custom_attributes,
             SubmitterParameters=submitter_parameters_job,
-            rrEnvList=environment_serialized,
+            rrEnvList=environment,
         )
 
+        if job_type == "RENDER":
+            threads = self.get_threads_per_instance(instance)
+            if threads:
+                add_command_line_flags(job, self.get_thread_flags(threads))
+
         return job
 
+    def write_farm_environment(
+        self,
+        instance: pyblish.api.Instance,
+        job_env: Dict[str, str],
+        directory: str,
+    ) -> Optional[str]:
+        """Resolve farm environment of job context and write it for clients.
+
+        Environment is resolved once per context in the publish.
+
+        Returns:
+            Optional[str]: Path to environment file, None when it couldn't
+                be resolved.
+
+        """
+        context_values = tuple(
+            job_env.get(key)
+            for key in (
+                "AYON_PROJECT_NAME",
+                "AYON_FOLDER_PATH",
+                "AYON_TASK_NAME",
+                "AYON_APP_NAME",
+            )
+        )
+        if not all(context_values):
+            self.log.debug(
+                "Job context is not complete, farm environment will be "
+                "extracted on render client."
+            )
+            return None
+
+        resolved = instance.context.data.setdefault("rrFarmEnvironments", {})
+        env = resolved.get(context_values)
+        try:
+            if env is None:
+                from ayon_applications.utils import (
+                    get_app_environments_for_context
+                )
+
+                env = get_app_environments_for_context(
+                    *context_values, env_group="farm", env={}
+                )
+                resolved[context_values] = env
+            return write_farm_env_file(
+                directory, env, job_env.get("AYON_BUNDLE_NAME"))
+        except Exception:
+            self.log.warning(
+                "Farm environment couldn't be resolved, it will be "
+                "extracted on render client.",
+                exc_info=True
+            )
+            return None
+
+    def create_tile_jobs(self, instance, job, expected_files):
+        """Split job to tile jobs and a job assembling the tiles.
+
+        Each tile job renders a region of the image into its own folder
+        `_tile<index>` created in folder common to all expected files, so
+        every output of the render (AOVs, multiple files) is written per
+        tile with the same relative path. Assembly job waits for all tile
+        jobs and pastes region of each tile into every expected file.
+
+        Args:
+            instance (Instance): Instance the job is created for.
+            job (RRJob): Job rendering whole image.
+            expected_files (list[str]): Files the job renders.
+
+        Returns:
+            tuple[list[RRJob], RRJob]: Tile jobs and assembly job.
+
+        """
+        tiles_x = int(instance.data.get("tilesX") or 1)
+        tiles_y = int(instance.data.get("tilesY") or 1)
+        if not job.ImageWidth or not job.ImageHeight:
+            raise KnownPublishError(
+                "Tile rendering requires resolution of the image.")
+
+        width = int(job.ImageWidth)
+        height = int(job.ImageHeight)
+        image_dir = os.path.normpath(job.ImageDir)
+        tiles_root = os.path.commonpath(
+            [image_dir]
+            + [os.path.dirname(os.path.normpath(path))
+               for path in expected_files]
+        )
+
+        tile_jobs = []
+        tiles = []
+        regions = get_tile_regions(width, height, tiles_x, tiles_y)
+        for index, region in enumerate(regions):
+            region_flags = self.get_region_flags(*region)
+            if not region_flags:
+                raise KnownPublishError(
+                    f"Tile rendering is not supported by '{self.label}'.")
+
+            tile_root = os.path.join(tiles_root, f"_tile{index}")
+            tile_image_dir = os.path.join(
+                tile_root, os.path.relpath(image_dir, tiles_root))
+            tile_job = attr.evolve(
+                job,
+                ImageDir=tile_image_dir.replace("\\", "/"),
+                CustomSHotName=f"{job.CustomSHotName} - tile {index}",
+                SubmitterParameters=list(job.SubmitterParameters),
+                CustomAttributes=list(job.CustomAttributes),
+                WaitForPreIDs=list(job.WaitForPreIDs),
+                rrEnvList=job.rrEnvList.copy(),
+                dependencies=job.dependencies,
+            )
+            add_command_line_flags(tile_job, region_flags)
+            tile_jobs.append(tile_job)
+
+            # regions are from bottom left corner, images are assembled
+            # in coordinates from top left corner
+            left, right, bottom, top = region
+            tiles.append((tile_root, [
+                left, height - 1 - top, right - left + 1, top - bottom + 1
+            ]))
+
+        # assembly job reads description of tiles for each output file
+        assembly = {
+            "width": width,
+            "height": height,
+            "files": [
+                {
+                    "output": path,
+                    "tiles": [
+                        {
+                            "path": os.path.join(
+                                tile_root,
+                                os.path.relpath(
+                                    os.path.normpath(path), tiles_root)
+                            ),
+                            "region": tile_region,
+                        }
+                        for tile_root, tile_region in tiles
+                    ]
+                }
+                for path in expected_files
+            ]
+        }
+        assembly_path = f"{job.ImageDir}/tile_assembly_{job.Layer}.json"
+        os.makedirs(job.ImageDir, exist_ok=True)
+        with open(assembly_path, "w") as f:
+            json.dump(assembly, f, indent=4)
+
+        assembly_job = attr.evolve(
+            job,
+            Software="AYON",
+            Renderer="Generic",
+            Version=(
+                os.environ.get("AYON_VERSION")
+                or get_ayon_launcher_version()
+            ),
+            SceneName=assembly_path,
+            SceneDatabaseDir=None,
+            CustomAddCmdFlags=(
+                'run "<rrLocalRenderScripts>ayon_tile_assembler.py" '
+                f'"{assembly_path}"'
+            ),
+            CustomSHotName=f"{job.CustomSHotName} - tile assembly",
+            SubmitterParameters=[
+                parameter
+                for parameter in job.SubmitterParameters
+                if parameter.name in {"SendJobDisabled", "Priority"}
+            ],
+            CustomAttributes=list(job.CustomAttributes),
+            WaitForPreIDs=[],
+            rrEnvList=job.rrEnvList.copy(),
+            dependencies=tile_jobs,
+        )
+        return tile_jobs, assembly_job
+
+    def get_region_flags(self, left, right, bottom, top):
+        """Render command line flags rendering only region of the image.
+
+        Hosts supporting tile rendering override this.
+
+        Args:
+            left (int): Left pixel of the region.
+            right (int): Right pixel of the region.
+            bottom (int): Bottom pixel of the region.
+            top (int): Top pixel of the region.
+
+        Returns:
+            str: Command line flags.
+
+        """
+        return ""
+
+    def get_chunk_parameters(self, instance, start_frame, end_frame, step):
+        """Get submitter parameters dividing sequence to tasks.
+
+        Artist selected "Frames Per Task" is used as both minimum and
+        maximum of frames in one task. When it is 0, the size is picked
+        by :func:`get_auto_chunk_size` from static `auto_chunk_clients`
+        estimate, available clients are not queried from RoyalRender.
+
+        Args:
+            instance (Instance): Instance the job is created for.
+            start_frame (int): Start frame.
+            end_frame (int): End frame.
+            step (int): Frame step.
+
+        Returns:
+            list[SubmitterParameter]: Sequence divide parameters.
+
+        """
+        attribute_values = instance.data.get("attributeValues", {})
+        chunk = int(attribute_values.get("chunk", self.chunk_size))
+        if chunk < 1:
+            frame_count = len(range(start_frame, end_frame + 1, step))
+            chunk = get_auto_chunk_size(
+                frame_count,
+                self.auto_chunk_clients,
+                self.auto_chunk_min_size,
+                self.auto_chunk_max_size,
+            )
+            self.log.debug(
+                f"Using {chunk} frames per task for {frame_count} frames.")
+
+        return [
+            SubmitterParameter("SeqDivMIN", "1", f"{chunk}"),
+            SubmitterParameter("SeqDivMAX", "1", f"{chunk}"),
+        ]
+
+    def get_concurrency_parameters(self, instance):
+        """Get submitter parameters for multiple instances per client.
+
+        Args:
+            instance (Instance): Instance the job is created for.
+
+        Returns:
+            list[SubmitterParameter]: Parameters starting multiple render
+                instances on one client.
+
+        """
+        concurrency = self._get_concurrency(instance)
+        if concurrency < 2:
+            return []
+        return [
+            SubmitterParameter(
+                "StartMultipleInstances", "1", f"{concurrency}"),
+        ]
+
+    def get_threads_per_instance(self, instance):
+        """Get amount of threads one render instance can use.
+
+        Returns:
+            int: Amount of threads, 0 if it should not be limited.
+
+        """
+        if not self.cores_per_client:
+            return 0
+        concurrency = self._get_concurrency(instance)
+        return max(int(self.cores_per_client) // concurrency, 1)
+
+    def get_thread_flags(self, threads):
+        """Render command line flags limiting amount of threads.
+
+        Hosts override this with flags of their render application.
+
+        Args:
+            threads (int): Amount of threads.
+
+        Returns:
+            str: Command line flags.
+
+        """
+        return ""
+
+    def get_gpu_parameters(self, instance):
+        """Get submitter parameters routing job to GPU or CPU clients.
+
+        Jobs are routed only by client group, GPU or CPU group is picked
+        by "Use GPU" of the instance.
+
+        Args:
+            instance (Instance): Instance the job is created for.
+
+        Returns:
+            list[SubmitterParameter]: Client group parameter, empty when
+                group is not set.
+
+        """
+        attribute_values = instance.data.get("attributeValues", {})
+        if attribute_values.get("use_gpu", self.use_gpu):
+            client_group = self.gpu_client_group
+        else:
+            client_group = self.cpu_client_group
+        if not client_group:
+            return []
+        return [SubmitterParameter("DefaultClientGroup", "1", client_group)]
+
+    def get_gpu_environment(self, instance):
+        """Get job environment requiring and splitting GPUs.
+
+        Minimal amount of GPUs is checked on render client by
+        `ayon_inject_envvar.py`. With "One render instance per GPU" one
+        render instance is started per GPU and RoyalRender passes GPU of
+        the instance as `<GpuListC>`.
+
+        Args:
+            instance (Instance): Instance the job is created for.
+
+        Returns:
+            dict[str, str]: Environment variables of the job.
+
+        """
+        attribute_values = instance.data.get("attributeValues", {})
+        if not attribute_values.get("use_gpu", self.use_gpu):
+            return {}
+        environment = {}
+        gpu_count = self._get_gpu_count(instance)
+        if gpu_count:
+            environment[MIN_GPUS_ENV_KEY] = f"{gpu_count}"
+        if self._get_split_gpus(instance):
+            environment["CUDA_VISIBLE_DEVICES"] = "<GpuListC>"
+        return environment
+
+    def _get_gpu_count(self, instance):
+        attribute_values = instance.data.get("attributeValues", {})
+        return int(attribute_values.get("gpu_count", self.gpu_count))
+
+    def _get_split_gpus(self, instance):
+        """Render instances are started per GPU."""
+        attribute_values = instance.data.get("attributeValues", {})
+        return (
+            attribute_values.get("use_gpu", self.use_gpu)
+            and attribute_values.get("split_gpus", self.split_gpus)
+            and self._get_gpu_count(instance) > 1
+        )
+
+    def _get_concurrency(self, instance):
+        if self._get_split_gpus(instance):
+            return self._get_gpu_count(instance)
+        attribute_values = instance.data.get("attributeValues", {})
+        return max(
+            int(attribute_values.get("concurrency", self.concurrent_tasks)),
+            1
+        )
+
     def update_job_with_host_specific(self, instance, job):
         """Host specific mapping for RRJob"""
         raise NotImplementedError
@@ -257,8 +684,9 @@ class BaseCreateRoyalRenderJob(
     def expected_files(self, instance, path, start_frame, end_frame):
         """Get expected files.
 
-        This function generate expected files from provided
-        path and start/end frames.
+        This function describes expected files from provided path,
+        start/end frames and frame step of the instance. Paths are created
+        only when the result is iterated.
 
         It was taken from Deadline module, but this should be
         probably handled better in collector to support more
@@ -271,31 +699,16 @@ class BaseCreateRoyalRenderJob(
             end_frame (int): End frame.
 
         Returns:
-            list: List of expected files.
+            FrameSequence: Expected files.
 
         """
-        dir_name = os.path.dirname(path)
-        file = os.path.basename(path)
-
-        expected_files = []
-
-        if "#" in file:
-            pparts = file.split("#")
-            padding = "%0{}d".format(len(pparts) - 1)
-            file = pparts[0] + padding + pparts[-1]
-
-        if "%" not in file:
-            expected_files.append(path)
-            return expected_files
-
-        if instance.data.get("slate"):
-            start_frame -= 1
-
-        expected_files.extend(
-            os.path.join(dir_name, (file % i)).replace("\\", "/")
-            for i in range(start_frame, (end_frame + 1))
+        return FrameSequence(
+            path,
+            start_frame,
+            end_frame,
+            step=int(instance.data.get("byFrameStep", 1)),
+            slate_offset=1 if instance.data.get("slate") else 0,
         )
-        return expected_files
 
     def pad_file_name(self, path, first_frame, padding):
         """Return output file path with #### for padding.
@@ -314,13 +727,10 @@ class BaseCreateRoyalRenderJob(
         """
         self.log.debug("pad_file_name path: `{}`".format(path))
         self.log.debug("padding_from_anatatomy_preset: `{}`".format(padding))
-        if "%" in path:
-            search_results = re.search(r"(%0)(\d)(d.)", path).groups()
-            self.log.debug("_ search_results: `{}`".format(search_results))
-            return int(search_results[1])
-        if "#" in path:
-            self.log.debug("already padded: `{}`".format(path))
-            return path
+        template = get_path_template(path)
+        if template.has_frame_token:
+            self.log.debug("template padding: `{}`".format(template.padding))
+            return template.to_hashes()
 
         if first_frame:
             path = path.replace(str(first_frame).zfill(padding), "#" * padding)
@@ -328,6 +738,109 @@ class BaseCreateRoyalRenderJob(
         return path
 
 
+def get_rr_api(context: pyblish.api.Context, rr_root: str) -> rrApi:
+    """Get RoyalRender API for root shared by all plugins in context."""
+    apis = context.data.setdefault("rrApis", {})
+    api = apis.get(rr_root)
+    if api is None:
+        api = rrApi(rr_root)
+        apis[rr_root] = api
+    return api
+
+
+def get_auto_chunk_size(
+    frame_count: int,
+    clients: int,
+    minimum: int = 1,
+    maximum: Optional[int] = None,
+) -> int:
+    """Get amount of frames per task spreading frames over clients.
+
+    Frames are split evenly so each client gets one task, but a task never
+    has less than `minimum` frames so the overhead of starting the render
+    application does not dominate short frames.
+
+    Args:
+        frame_count (int): Amount of frames in the job.
+        clients (int): Amount of clients expected to render the job.
+        minimum (int): Minimal amount of frames in a task.
+        maximum (Optional[int]): Maximal amount of frames in a task.
+
+    Returns:
+        int: Amount of frames per task.
+
+    """
+    chunk = math.ceil(frame_count / max(clients, 1))
+    chunk = max(chunk, minimum)
+    if maximum:
+        chunk = min(chunk, maximum)
+    return max(min(chunk, frame_count), 1)
+
+
+def add_command_line_flags(job: RRJob, flags: str) -> None:
+    """Append flags to render command line of the job.
+
+    Flags are passed to `<AdditionalCommandlineParam>` of the render
+    config, flags already set on the job are kept.
+
+    Args:
+        job (RRJob): Job to modify.
+        flags (str): Command line flags.
+
+    """
+    if not flags:
+        return
+    for idx, parameter in enumerate(job.SubmitterParameters):
+        if parameter.name == "AdditionalCommandlineParam":
+            flags = f"{parameter.values[-1]} {flags}"
+            job.SubmitterParameters.pop(idx)
+            break
+    job.SubmitterParameters.append(
+        SubmitterParameter("AdditionalCommandlineParam", "0", "1", flags)
+    )
+
+
+def get_tile_regions(
+    width: int, height: int, tiles_x: int, tiles_y: int
+) -> "list[tuple[int, int, int, int]]":
+    """Split image to regions of tiles.
+
+    Pixel coordinates are inclusive and start in bottom left corner.
+
+    Args:
+        width (int): Width of the image.
+        height (int): Height of the image.
+        tiles_x (int): Amount of tiles in horizontal direction.
+        tiles_y (int): Amount of tiles in vertical direction.
+
+    Returns:
+        list[tuple[int, int, int, int]]: Left, right, bottom and top pixel
+            of each tile.
+
+    """
+    regions = []
+    for tile_y in range(tiles_y):
+        bottom = tile_y * height // tiles_y
+        top = (tile_y + 1) * height // tiles_y - 1
+        for tile_x in range(tiles_x):
+            left = tile_x * width // tiles_x
+            right = (tile_x + 1) * width // tiles_x - 1
+            regions.append((left, right, bottom, top))
+    return regions
+
+
+def get_expected_files(instance: pyblish.api.Instance) -> list:
+    """Get expected files of instance including files of RR jobs.
+
+    Expected sequences of RR jobs are kept as `FrameSequence` objects and
+    expanded to paths in `expectedFiles` only by the first call.
+    """
+    expected_files = instance.data.setdefault("expectedFiles", [])
+    for sequence in instance.data.pop(EXPECTED_SEQUENCES_KEY, []):
+        expected_files.extend(sequence)
+    return expected_files
+
+
 def get_instance_job_envs(instance) -> "dict[str, str]":
     """Add all job environments as specified on the instance and context.
 
@@ -4,10 +4,15 @@ Requires:
     instance.context.data["project_settings"]
 Provides:
     instance.data["rr_root"] (str) - root folder of RoyalRender server
+    instance.data["rr_root_unreachable"] (bool) - no selected root exists,
+        first selected one is used so submission can be spooled, set only
+        when spooling of submissions is enabled
 """
-import os.path
+from typing import Optional  # noqa: F401
 
 import pyblish.api
+from ayon_core.pipeline.publish import KnownPublishError
+from ayon_royalrender.root_selection import FIRST_AVAILABLE, select_root
 from ayon_royalrender.rr_job import get_rr_platform
 
 
@@ -25,8 +30,26 @@ class CollectRRPathFromInstance(pyblish.api.InstancePlugin):
     label = "Collect Royal Render path name from the Instance"
     families = ["render", "prerender", "renderlayer", "pointcache"]
 
+    # `RootProbe` used by "least_loaded" root selection, first available
+    # root is used without it
+    root_probe = None
+
     def process(self, instance):
-        instance.data["rr_root"] = self._collect_root(instance)
+        # root is selected per instance so instances can be split between
+        # farms, all jobs of the instance (publish job included) use it
+        rr_root = self._collect_root(instance)
+        if rr_root is None:
+            rr_root = self._get_first_selected_root(instance)
+            if rr_root:
+                if not self._is_spooling_enabled(instance):
+                    raise KnownPublishError(
+                        "RoyalRender root '{}' is not reachable.".format(
+                            rr_root))
+                self.log.warning(
+                    "RoyalRender root '{}' is not reachable, submission "
+                    "will be spooled.".format(rr_root))
+                instance.data["rr_root_unreachable"] = True
+        instance.data["rr_root"] = rr_root
         self.log.info(
             "Using '{}' for submission.".format(instance.data["rr_root"]))
 
@@ -37,6 +60,30 @@ class CollectRRPathFromInstance(pyblish.api.InstancePlugin):
         to creator. It is not there yet.
         """
         rr_settings = instance.context.data["project_settings"]["royalrender"]
+        strategy = rr_settings.get("root_selection", FIRST_AVAILABLE)
+        return select_root(
+            self._get_selected_roots(instance), strategy, self.root_probe)
+
+    def _get_first_selected_root(self, instance):
+        # type: (pyblish.api.Instance) -> Optional[str]
+        for rr_root in self._get_selected_roots(instance):
+            if rr_root:
+                return rr_root
+        return None
+
+    @staticmethod
+    def _is_spooling_enabled(instance):
+        # type: (pyblish.api.Instance) -> bool
+        rr_settings = instance.context.data["project_settings"]["royalrender"]
+        submit_settings = (
+            rr_settings.get("publish", {}).get("SubmitJobsToRoyalRender", {})
+        )
+        return bool(submit_settings.get("spool_submissions", False))
+
+    @staticmethod
+    def _get_selected_roots(instance):
+        # type: (pyblish.api.Instance) -> list[str]
+        rr_settings = instance.context.data["project_settings"]["royalrender"]
         rr_paths = rr_settings["rr_paths"]
         selected_keys = rr_settings["selected_rr_paths"]
 
@@ -45,8 +92,4 @@ class CollectRRPathFromInstance(pyblish.api.InstancePlugin):
             item["name"]: item["value"][platform]
             for item in rr_paths
         }
-
-        for selected_key in selected_keys:
-            rr_root = key_to_path[selected_key]
-            if os.path.exists(rr_root):
-                return rr_root
+        return [key_to_path[selected_key] for selected_key in selected_keys]
@@ -25,6 +25,12 @@ class CreateMayaRoyalRenderJob(lib.BaseCreateRoyalRenderJob):
 
         return job
 
+    def get_thread_flags(self, threads):
+        return f"-n {threads}"
+
+    def get_region_flags(self, left, right, bottom, top):
+        return f"-reg {left} {right} {bottom} {top}"
+
     def process(self, instance):
         """Plugin entry point."""
         super(CreateMayaRoyalRenderJob, self).process(instance)
@@ -42,4 +48,16 @@ class CreateMayaRoyalRenderJob(lib.BaseCreateRoyalRenderJob):
         )
         job = self.update_job_with_host_specific(instance, job)
 
-        instance.data["rrJobs"].append(job)
+        if not instance.data.get("tileRendering"):
+            instance.data["rrJobs"].append(job)
+            return
+
+        tile_jobs, assembly_job = self.create_tile_jobs(
+            instance, job, list(iter_expected_files(expected_files))
+        )
+        self.log.info(
+            f"Rendering {len(tile_jobs)} tiles assembled by separate job.")
+        instance.data["rrJobs"].extend(tile_jobs)
+        instance.data["rrJobs"].append(assembly_job)
+        # publish job waits only for assembly
+        instance.data["assemblySubmissionJobs"] = [assembly_job]
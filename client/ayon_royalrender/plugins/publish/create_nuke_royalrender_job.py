@@ -46,6 +46,9 @@ class CreateNukeRoyalRenderJob(lib.BaseCreateRoyalRenderJob):
 
         return job
 
+    def get_thread_flags(self, threads):
+        return f"-m {threads}"
+
     def create_jobs(self, instance):
         """Nuke creates multiple RR jobs - for baking etc."""
         # get output path
@@ -54,17 +57,20 @@ class CreateNukeRoyalRenderJob(lib.BaseCreateRoyalRenderJob):
         node = instance.data["transientData"]["node"]
 
         # main job
-        jobs = [self.get_job(instance, script_path, render_path, node.name())]
+        render_job = self.get_job(
+            instance, script_path, render_path, node.name())
+        jobs = [render_job]
 
         for baking_script in instance.data.get("bakingNukeScripts", []):
             render_path = baking_script["bakeRenderPath"]
             script_path = baking_script["bakeScriptPath"]
             exe_node_name = baking_script["bakeWriteNodeName"]
             single = True
-            jobs.append(
-                self.get_job(
-                    instance, script_path, render_path, exe_node_name, single
-                )
+            baking_job = self.get_job(
+                instance, script_path, render_path, exe_node_name, single
             )
+            # baking reads frames rendered by main job
+            baking_job.add_dependencies(render_job)
+            jobs.append(baking_job)
 
         return jobs
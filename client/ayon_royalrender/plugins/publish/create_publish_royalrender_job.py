@@ -12,7 +12,11 @@ from ayon_royalrender.rr_job import (
     SubmitterParameter,
     get_rr_platform
 )
-from ayon_royalrender.lib import get_instance_job_envs, JobType
+from ayon_royalrender.lib import (
+    get_expected_files,
+    get_instance_job_envs,
+    JobType,
+)
 from ayon_core.pipeline.publish import KnownPublishError
 from ayon_core.pipeline.farm.pyblish_functions import (
     create_skeleton_instance,
@@ -81,7 +85,8 @@ class CreatePublishRoyalRenderJob(pyblish.api.InstancePlugin,
             self.log.debug("Instance has review explicitly disabled.")
             do_not_add_review = True
 
-        if isinstance(instance.data.get("expectedFiles")[0], dict):
+        expected_files = get_expected_files(instance)
+        if isinstance(expected_files[0], dict):
             instances = create_instances_for_aov(
                 instance, instance_skeleton_data,
                 self.aov_filter, self.skip_integration_repre_list,
@@ -90,7 +95,7 @@ class CreatePublishRoyalRenderJob(pyblish.api.InstancePlugin,
         else:
             representations = prepare_representations(
                 instance_skeleton_data,
-                instance.data.get("expectedFiles"),
+                expected_files,
                 self.anatomy,
                 self.aov_filter,
                 self.skip_integration_repre_list,
@@ -134,7 +139,8 @@ class CreatePublishRoyalRenderJob(pyblish.api.InstancePlugin,
             "version": instance.context.data["version"],   # workfile version
             "intent": instance.context.data.get("intent"),
             "comment": instance.context.data.get("comment"),
-            "job": attr.asdict(rr_job),
+            "job": attr.asdict(
+                rr_job, filter=lambda a, _: not a.name.startswith("_")),
             "instances": instances
         }
 
@@ -146,6 +152,7 @@ class CreatePublishRoyalRenderJob(pyblish.api.InstancePlugin,
         #convert submitter parameters to str as preparation for
         #json dump - needs improvement
         publish_job["job"]["SubmitterParameters"] = str(publish_job["job"]["SubmitterParameters"])
+        publish_job["job"]["rrEnvList"] = rr_job.rrEnvList.serialize()
 
 
         with open(metadata_path, "w") as f:
@@ -170,24 +177,8 @@ class CreatePublishRoyalRenderJob(pyblish.api.InstancePlugin,
         product_name = data["productName"]
         jobname = "Publish - {}".format(product_name)
 
-        environment = get_instance_job_envs(instance)
+        environment = RREnvList(get_instance_job_envs(instance))
         environment.update(JobType["PUBLISH"].get_job_env())
-        environment = RREnvList(**environment)
-        environment_serialized = environment.serialize()
-
-        # pass environment keys from self.environ_job_filter
-        # and collect all pre_ids to wait for
-        job_environ = {}
-        jobs_pre_ids = []
-        for job in instance.data["rrJobs"]:  # type: RRJob
-            if job.rrEnvList:
-                if len(job.rrEnvList) > 2000:
-                    self.log.warning(("Job environment is too long "
-                                      f"{len(job.rrEnvList)} > 2000"))
-                job_environ.update(
-                    dict(RREnvList.parse(job.rrEnvList))
-                )
-            jobs_pre_ids.append(job.PreID)
 
         priority = self.priority or instance.data.get("priority", 50)
         suspend_publish = instance.data.get("suspend_publish", False)
@@ -239,7 +230,7 @@ class CreatePublishRoyalRenderJob(pyblish.api.InstancePlugin,
             ImageExtension="",
             ImagePreNumberLetter="",
             SceneOS=get_rr_platform(),
-            rrEnvList=environment_serialized,
+            rrEnvList=environment,
             CustomSHotName=jobname,
             CompanyProjectName=instance.context.data["projectName"],
             SubmitterParameters=submitter_parameters_job
@@ -248,11 +239,32 @@ class CreatePublishRoyalRenderJob(pyblish.api.InstancePlugin,
         # add assembly jobs as dependencies
         if instance.data.get("tileRendering"):
             self.log.info("Adding tile assembly jobs as dependencies...")
-            job.WaitForPreIDs += instance.data.get("assemblySubmissionJobs")
+            self._add_dependencies(
+                job, instance.data.get("assemblySubmissionJobs"))
         elif instance.data.get("bakingSubmissionJobs"):
             self.log.info("Adding baking submission jobs as dependencies...")
-            job.WaitForPreIDs += instance.data["bakingSubmissionJobs"]
+            self._add_dependencies(
+                job, instance.data["bakingSubmissionJobs"])
         else:
-            job.WaitForPreIDs += jobs_pre_ids
+            job.add_dependencies(*instance.data["rrJobs"])
 
         return job
+
+    @staticmethod
+    def _add_dependencies(job, dependencies):
+        """Make job wait for other jobs of the submission.
+
+        PreIDs are assigned only when jobs are submitted, so dependencies
+        must be jobs, not PreIDs.
+        """
+        invalid = [
+            dependency
+            for dependency in dependencies or []
+            if not isinstance(dependency, RRJob)
+        ]
+        if invalid:
+            raise KnownPublishError(
+                "Publish job can depend only on RoyalRender jobs, got: "
+                "{}".format(", ".join(repr(item) for item in invalid))
+            )
+        job.add_dependencies(*(dependencies or []))
@@ -1,102 +1,484 @@
 # -*- coding: utf-8 -*-
 """Submit jobs to RoyalRender."""
+import os
 import tempfile
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    TimeoutError as FutureTimeoutError,
+    as_completed,
+)
+from typing import Optional  # noqa: F401
 
 import pyblish.api
 from ayon_royalrender.api import (
     RRJob,
     Api as rrApi,
+    SubmitFile,  # noqa: F401
     SubmitterParameter
 )
+from ayon_royalrender.env_file import (
+    MAX_ENV_LIST_LENGTH,
+    share_job_environments,
+)
+from ayon_royalrender.job_graph import (
+    JobGraph,
+    JobGraphError,
+    assign_batch_pre_ids,
+)
+from ayon_royalrender.lib import get_rr_api
+from ayon_royalrender.spool import SubmissionSpool
+from ayon_royalrender.submission_ledger import (
+    SubmissionLedger,
+    get_job_hashes,
+    get_skippable_jobs,
+)
 from ayon_core.pipeline.publish import KnownPublishError
 
+# RoyalRender root jobs are submitted to
+RootTarget = namedtuple("RootTarget", ["rr_root", "api", "unreachable"])
+
 
 class SubmitJobsToRoyalRender(pyblish.api.ContextPlugin):
     """Find all jobs, create submission XML and submit it to RoyalRender."""
     label = "Submit jobs to RoyalRender"
     order = pyblish.api.IntegratorOrder + 0.3
     targets = ["local"]
+    settings_category = "royalrender"
+
+    # Write submission file without indentation
+    compact_xml = False
+    # Move environment shared by jobs to one environment file
+    share_environment = True
+    # Seconds for which submitted jobs are remembered to detect duplicate
+    # submissions, 0 disables the check (default)
+    duplicate_window = 0
+    # What to do with duplicate jobs, "skip" or "warn", both are reported
+    # as warnings
+    duplicate_action = "skip"
+    # Split submission to files with at most this many jobs, jobs
+    # connected by dependencies stay in one file, 0 disables splitting
+    max_jobs_per_file = 0
+    # Number of submission files submitted at the same time
+    max_parallel_submissions = 4
+    # Run submission in background and wait for it at most
+    # `submission_timeout` seconds, rest of submission is only logged
+    async_submission = False
+    submission_timeout = 60.0
+    # Write submissions which can't reach RoyalRender to local spool,
+    # they are submitted later by `royalrender flush-spool` command
+    spool_submissions = False
 
     def __init__(self):
         super(SubmitJobsToRoyalRender, self).__init__()
-        self._rr_root = None
-        self._rr_api = None
         self._submission_parameters = []
+        self._ledger = None
+        self._job_hashes = {}
 
     def process(self, context):
 
         # iterate over all instances and try to find RRJobs
         jobs = []
+        job_roots = {}
+        targets = OrderedDict()
         auto_delete = False
-        instance_rr_path = None
         for instance in context:
             if not instance.data.get("farm"):
                 self.log.info("Skipping local instance.")
                 continue
+            instance_jobs = []
             if isinstance(instance.data.get("rrJob"), RRJob):
-                jobs.append(instance.data.get("rrJob"))
+                instance_jobs.append(instance.data.get("rrJob"))
             if instance.data.get("rrJobs"):
                 if all(
                         isinstance(job, RRJob)
                         for job in instance.data.get("rrJobs")):
-                    jobs += instance.data.get("rrJobs")
-            if instance.data.get("rr_root"):
-                instance_rr_path = instance.data["rr_root"]
+                    instance_jobs += instance.data.get("rrJobs")
             if instance.data.get("auto_delete"):
                 #GlobalSubmissionParameter
                 auto_delete=instance.data["auto_delete"]
+            if not instance_jobs:
+                continue
 
-
-        if jobs:
-            self._rr_root = instance_rr_path
-            if not self._rr_root:
+            rr_root = instance.data.get("rr_root")
+            if not rr_root:
                 raise KnownPublishError(
                     ("Missing RoyalRender root. "
                      "You need to configure RoyalRender module."))
-            self._rr_api = rrApi(self._rr_root)
-            self._submission_parameters = self.get_submission_parameters(auto_delete)
-            self.process_submission(jobs)
+            if rr_root not in targets:
+                unreachable = instance.data.get("rr_root_unreachable", False)
+                if unreachable and not self.spool_submissions:
+                    raise KnownPublishError(
+                        "RoyalRender root '{}' is not reachable.".format(
+                            rr_root))
+                targets[rr_root] = RootTarget(
+                    rr_root, get_rr_api(context, rr_root), unreachable)
+            for job in instance_jobs:
+                job_roots.setdefault(id(job), rr_root)
+            jobs += instance_jobs
+
+        if not jobs:
+            self.log.info("No RoyalRender jobs found")
             return
 
-        self.log.info("No RoyalRender jobs found")
+        self._submission_parameters = self.get_submission_parameters(
+            auto_delete)
+        if self.duplicate_window > 0:
+            self._ledger = SubmissionLedger(self.duplicate_window)
+
+        groups = self.group_jobs_by_root(jobs, job_roots)
+        if len(groups) == 1:
+            rr_root, root_jobs = next(iter(groups.items()))
+            self.process_submission(root_jobs, targets[rr_root])
+            return
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+            futures = {
+                executor.submit(
+                    self.process_submission, root_jobs, targets[rr_root]
+                ): rr_root
+                for rr_root, root_jobs in groups.items()
+            }
+            for future in as_completed(futures):
+                rr_root = futures[future]
+                try:
+                    future.result()
+                except Exception as exc:
+                    self.log.error(
+                        "Submission to '{}' failed: {}".format(rr_root, exc),
+                        exc_info=True
+                    )
+                    failed.append(rr_root)
+
+        if failed:
+            raise KnownPublishError(
+                "Submission to {} out of {} RoyalRender root(s) failed: "
+                "{}".format(len(failed), len(groups), ", ".join(failed))
+            )
+
+    @staticmethod
+    def group_jobs_by_root(jobs, job_roots):
+        # type: (list[RRJob], dict[int, str]) -> OrderedDict
+        """Split jobs by RoyalRender root they are submitted to.
 
-    def process_submission(self, jobs):
-        # type: ([RRJob]) -> None
+        Args:
+            jobs (list[RRJob]): All jobs.
+            job_roots (dict[int, str]): Root by `id` of the job.
 
-        idx_pre_id = 0
+        Returns:
+            OrderedDict[str, list[RRJob]]: Jobs by root.
+
+        Raises:
+            KnownPublishError: When job depends on job submitted to
+                different root.
+
+        """
+        groups = OrderedDict()
+        cross_root = []
         for job in jobs:
-            job.PreID = idx_pre_id
-            if idx_pre_id > 0:
-                job.WaitForPreIDs.append(idx_pre_id - 1)
-                # adjust rr pre id for publish job
-                if job.SceneName.endswith("metadata.json"):
-                    idx_pre_id =+ 10
-            idx_pre_id += 1
+            rr_root = job_roots[id(job)]
+            groups.setdefault(rr_root, []).append(job)
+            for dependency in job.dependencies:
+                dependency_root = job_roots.get(id(dependency))
+                if dependency_root is not None and dependency_root != rr_root:
+                    cross_root.append("'{}' ({}) -> '{}' ({})".format(
+                        job.CustomSHotName or job.SceneName, rr_root,
+                        dependency.CustomSHotName or dependency.SceneName,
+                        dependency_root
+                    ))
+        if cross_root:
+            raise KnownPublishError(
+                "Jobs can't depend on jobs submitted to different "
+                "RoyalRender root: {}".format(", ".join(cross_root))
+            )
+        return groups
+
+    def process_submission(self, jobs, target):
+        # type: (list[RRJob], RootTarget) -> None
+
+        if self._ledger is not None:
+            job_hashes = get_job_hashes(jobs)
+            self._job_hashes.update(job_hashes)
+            jobs = self.filter_duplicates(jobs, job_hashes, self._ledger)
+            if not jobs:
+                self.log.warning(
+                    "All jobs for '{}' were already submitted in last {} "
+                    "seconds, nothing was submitted.".format(
+                        target.rr_root, self.duplicate_window))
+                return
+
+        try:
+            graph = JobGraph(jobs)
+            levels = graph.get_levels()
+            batches = [graph.jobs]
+            if self.max_jobs_per_file > 0:
+                batches = graph.split(self.max_jobs_per_file)
+            rounds = assign_batch_pre_ids(batches)
+        except JobGraphError as exc:
+            raise KnownPublishError(str(exc))
+
+        batches = [
+            batch for round_batches in rounds for batch in round_batches
+        ]
+        jobs = [job for batch in batches for job in batch]
+        self.log.debug(
+            "Submitting {} job(s) to '{}' in {} dependency level(s), up to "
+            "{} job(s) in parallel.".format(
+                len(jobs), target.rr_root, len(levels),
+                max(len(level) for level in levels)
+            )
+        )
+
+        if self.share_environment:
+            self.share_environments(jobs)
+
+        if len(batches) == 1:
+            self.submit_batch(jobs, target)
+            return
+
+        # batches of one round don't share PreIDs, rounds reuse them so
+        # they are submitted one after another
+        failed = []
+        for round_batches in rounds:
+            failed.extend(self.submit_batches(round_batches, target))
+        if failed:
+            raise KnownPublishError(
+                "Submission of {} out of {} file(s) failed: {}".format(
+                    len(failed), len(batches), ", ".join(failed))
+            )
+
+    def submit_batch(self, jobs, target):
+        # type: (list[RRJob], RootTarget) -> str
+        """Write jobs to submission file and submit it.
+
+        Returns:
+            str: Path to submitted or spooled file.
 
+        """
         submission = rrApi.create_submission(
             jobs,
             self._submission_parameters)
 
-        xml = tempfile.NamedTemporaryFile(suffix=".xml", delete=False)
-        with open(xml.name, "w") as f:
-            f.write(submission.serialize())
+        if target.unreachable:
+            return self.spool_submission(submission, target)
 
-        self.log.info("submitting job(s) file: {}".format(xml.name))
-        self._rr_api.submit_file(file=xml.name)
+        mode = rrApi.RR_SUBMIT_CONSOLE
+        # file is closed before it is passed to `rrSubmitterconsole`
+        handle, file = tempfile.mkstemp(suffix=".xml")
+        with os.fdopen(handle, "w") as f:
+            submission.write(f, compact=self.compact_xml)
+        label = file
+
+        self.log.info("submitting job(s) file: {}".format(label))
+        if not self.async_submission:
+            try:
+                target.api.submit_file(file=file, mode=mode)
+            except Exception:
+                if not self.spool_submissions:
+                    raise
+                self.log.warning(
+                    "Submission of {} failed.".format(label), exc_info=True)
+                return self.spool_submission(submission, target)
+            self.record_submitted(jobs)
+            return label
+
+        future = target.api.submit_file_async(file, mode)
+        try:
+            future.result(timeout=self.submission_timeout)
+        except FutureTimeoutError:
+            self.log.warning(
+                "Submission of {} is still running after {}s, its result "
+                "is pending. It will finish in background and its result "
+                "will be written to '{}'.{}".format(
+                    label,
+                    self.submission_timeout,
+                    SubmissionSpool().results_path,
+                    (
+                        " If it fails, it is spooled and submitted by "
+                        "'royalrender flush-spool' command."
+                    ) if self.spool_submissions else ""
+                )
+            )
+            future.add_done_callback(
+                lambda f: self._on_background_submission(
+                    f, label, submission, target)
+            )
+        except Exception:
+            if not self.spool_submissions:
+                raise
+            self.log.warning(
+                "Submission of {} failed.".format(label), exc_info=True)
+            return self.spool_submission(submission, target)
+        else:
+            self.record_submitted(jobs)
+        return label
+
+    def spool_submission(self, submission, target):
+        # type: (SubmitFile, RootTarget) -> str
+        """Write submission to local spool to be submitted later.
+
+        Returns:
+            str: Path to spooled submission file.
+
+        """
+        path = SubmissionSpool().add(submission, target.rr_root)
+        self.log.warning(
+            "Submission of {} job(s) was spooled to '{}', it will be "
+            "submitted by 'royalrender flush-spool' command.".format(
+                len(submission.Jobs), path)
+        )
+        return path
+
+    def _on_background_submission(self, future, path, submission, target):
+        """Keep outcome of submission which finished after publish waited.
+
+        Publish report might be closed already, so the outcome is written
+        to results of spool. Failed submission is spooled to be submitted
+        again when `spool_submissions` is enabled.
+        """
+        spool = SubmissionSpool()
+        exc = future.exception()
+        if exc is None:
+            self.log.info(
+                "Background submission of {} finished.".format(path))
+            self.record_submitted(submission.Jobs)
+            spool.record_result(path, target.rr_root)
+            return
+
+        self.log.error(
+            "Background submission of {} failed: {}".format(path, exc))
+        spooled = None
+        try:
+            if self.spool_submissions:
+                spooled = self.spool_submission(submission, target)
+        finally:
+            spool.record_result(
+                path, target.rr_root, error=str(exc), spooled=spooled)
+
+    def record_submitted(self, jobs):
+        # type: (list[RRJob]) -> None
+        """Record submitted jobs to detect their duplicate submission."""
+        if self._ledger is not None:
+            self._ledger.record([self._job_hashes[id(job)] for job in jobs])
+
+    def submit_batches(self, batches, target):
+        # type: (list[list[RRJob]], RootTarget) -> list[str]
+        """Submit batches of jobs in parallel.
+
+        Returns:
+            list[str]: Descriptions of failed batches.
+
+        """
+        def _submit(batch):
+            start = time.time()
+            path = self.submit_batch(batch, target)
+            return path, time.time() - start
+
+        failed = []
+        workers = max(1, min(self.max_parallel_submissions, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_submit, batch): index
+                for index, batch in enumerate(batches, 1)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                batch = batches[index - 1]
+                try:
+                    path, duration = future.result()
+                except Exception as exc:
+                    self.log.error(
+                        "Submission {}/{} with {} job(s) failed: {}".format(
+                            index, len(batches), len(batch), exc),
+                        exc_info=True
+                    )
+                    failed.append("#{}".format(index))
+                    continue
+                self.log.info(
+                    "Submitted {}/{} with {} job(s) in {:.2f}s: {}".format(
+                        index, len(batches), len(batch), duration, path)
+                )
+        return failed
+
+    def filter_duplicates(self, jobs, job_hashes, ledger):
+        # type: (list[RRJob], dict, SubmissionLedger) -> list[RRJob]
+        """Leave out jobs submitted already within `duplicate_window`."""
+        submitted = ledger.get_submitted(list(job_hashes.values()))
+        duplicates = [
+            job for job in jobs if job_hashes[id(job)] in submitted
+        ]
+        if not duplicates:
+            return jobs
+
+        if self.duplicate_action != "skip":
+            for job in duplicates:
+                self.log.warning(
+                    "Job '{}' was already submitted in last {} "
+                    "seconds.".format(
+                        job.CustomSHotName or job.SceneName,
+                        self.duplicate_window
+                    )
+                )
+            return jobs
+
+        skipped = get_skippable_jobs(jobs, duplicates)
+        for job in skipped:
+            self.log.warning(
+                "Skipping job '{}' already submitted in last {} "
+                "seconds.".format(
+                    job.CustomSHotName or job.SceneName,
+                    self.duplicate_window
+                )
+            )
+        skipped_ids = {id(job) for job in skipped}
+        return [job for job in jobs if id(job) not in skipped_ids]
+
+    def share_environments(self, jobs):
+        # type: (list[RRJob]) -> None
+        """Write environment shared by jobs next to publish metadata."""
+        env_dir = self.get_environment_dir(jobs)
+        if not env_dir:
+            self.log.debug("No directory for shared environment file.")
+            return
+
+        over_limit = share_job_environments(jobs, env_dir)
+        for job in over_limit:
+            self.log.warning(
+                "Job environment is too long {} > {}: {}".format(
+                    len(job.rrEnvList.serialize()), MAX_ENV_LIST_LENGTH,
+                    job.CustomSHotName
+                )
+            )
+
+    @staticmethod
+    def get_environment_dir(jobs):
+        # type: (list[RRJob]) -> Optional[str]
+        """Directory accessible by render clients for environment files.
+
+        Metadata folder of publish job is preferred, otherwise output
+        folder of the first job is used.
+        """
+        for job in jobs:
+            if job.SceneName.endswith("metadata.json"):
+                return os.path.dirname(job.SceneName)
+        for job in jobs:
+            if job.ImageDir and "<" not in job.ImageDir:
+                return job.ImageDir
+        return None
 
     def create_file(self, name, ext, contents=None):
-        temp = tempfile.NamedTemporaryFile(
+        handle, path = tempfile.mkstemp(
             dir=self.tempdir,
             suffix=ext,
             prefix=name + '.',
-            delete=False,
         )
-
-        if contents:
-            with open(temp.name, 'w') as f:
+        with os.fdopen(handle, 'w') as f:
+            if contents:
                 f.write(contents)
 
-        return temp.name
+        return path
 
     def get_submission_parameters(self, auto_delete):
         if auto_delete:
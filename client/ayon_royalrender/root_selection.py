@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Selection of RoyalRender root from roots selected for project.
+
+Strategies:
+    first_available: First root which exists.
+    round_robin: Rotate over existing roots.
+    least_loaded: Root with the least queued jobs per free client, load
+        is queried by :class:`RootProbe` and cached for a short time. The
+        addon has no default probe, studio provides it. Without probe or
+        when load can't be queried, first available root is used.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional  # noqa: F401
+
+from ayon_core.lib import Logger
+
+from .api import path_exists
+
+FIRST_AVAILABLE = "first_available"
+ROUND_ROBIN = "round_robin"
+LEAST_LOADED = "least_loaded"
+ROOT_SELECTION_STRATEGIES = (FIRST_AVAILABLE, ROUND_ROBIN, LEAST_LOADED)
+
+# Seconds for which load of root is reused
+LOAD_CACHE_TTL = 30
+
+RootLoad = namedtuple("RootLoad", ["queued_jobs", "free_clients"])
+
+_round_robin_counters = {}
+# root -> (load, queried at)
+_load_cache = {}
+_lock = threading.Lock()
+
+
+class RootProbe(ABC):
+    """Query load of RoyalRender root.
+
+    Load is not queried from RoyalRender by the addon, studio can pass
+    its subclass (e.g. asking monitoring service) to :func:`select_root`
+    to use `least_loaded` strategy.
+    """
+
+    @abstractmethod
+    def get_load(self, rr_root):
+        # type: (str) -> Optional[RootLoad]
+        """Get load of root, `None` when it can't be queried."""
+        pass
+
+
+def select_root(rr_roots, strategy=FIRST_AVAILABLE, probe=None):
+    # type: (list[str], str, Optional[RootProbe]) -> Optional[str]
+    """Select root jobs are submitted to.
+
+    Args:
+        rr_roots (list[str]): Roots in order of preference.
+        strategy (str): One of `ROOT_SELECTION_STRATEGIES`.
+        probe (Optional[RootProbe]): Probe used by `least_loaded`.
+
+    Returns:
+        Optional[str]: Selected root, `None` if no root exists.
+
+    Raises:
+        ValueError: When strategy is unknown.
+
+    """
+    available = [
+        rr_root for rr_root in rr_roots if rr_root and path_exists(rr_root)
+    ]
+    if len(available) < 2 or strategy == FIRST_AVAILABLE:
+        return available[0] if available else None
+
+    if strategy == ROUND_ROBIN:
+        key = tuple(available)
+        with _lock:
+            index = _round_robin_counters.get(key, 0)
+            _round_robin_counters[key] = index + 1
+        return available[index % len(available)]
+
+    if strategy == LEAST_LOADED:
+        queried = []
+        if probe is not None:
+            loads = get_root_loads(available, probe)
+            queried = [
+                (load.queued_jobs / (load.free_clients + 1), index)
+                for index, load in enumerate(loads)
+                if load is not None
+            ]
+        if queried:
+            return available[min(queried)[1]]
+        log = Logger.get_logger(__name__)
+        log.warning(
+            "Load of RoyalRender roots couldn't be queried, using first "
+            "available root '{}'.".format(available[0])
+        )
+        return available[0]
+
+    raise ValueError(
+        "Unknown root selection strategy '{}', expected one of: {}".format(
+            strategy, ", ".join(ROOT_SELECTION_STRATEGIES))
+    )
+
+
+def get_root_loads(rr_roots, probe):
+    # type: (list[str], RootProbe) -> list[Optional[RootLoad]]
+    """Get load of roots, roots without cached load are queried at once."""
+    now = time.monotonic()
+    loads = {}
+    with _lock:
+        for rr_root in rr_roots:
+            cached = _load_cache.get(rr_root)
+            if cached is not None and now - cached[1] < LOAD_CACHE_TTL:
+                loads[rr_root] = cached[0]
+
+    missing = [rr_root for rr_root in rr_roots if rr_root not in loads]
+    if missing:
+        with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+            queried = list(executor.map(
+                lambda rr_root: _get_load(probe, rr_root), missing))
+        with _lock:
+            for rr_root, load in zip(missing, queried):
+                _load_cache[rr_root] = (load, now)
+                loads[rr_root] = load
+    return [loads[rr_root] for rr_root in rr_roots]
+
+
+def _get_load(probe, rr_root):
+    # type: (RootProbe, str) -> Optional[RootLoad]
+    try:
+        return probe.get_load(rr_root)
+    except Exception:
+        Logger.get_logger(__name__).warning(
+            "Load of RoyalRender root '{}' couldn't be queried.".format(
+                rr_root),
+            exc_info=True
+        )
+        return None
@@ -1,14 +1,25 @@
 # -*- coding: utf-8 -*-
 """Python wrapper for RoyalRender XML job file."""
+import functools
+import io
 import sys
-from typing import Optional  # noqa: F401
-from xml.dom import minidom as md
+from typing import IO, Any, Callable, Optional, Union  # noqa: F401
+from xml.etree import ElementTree
 import attr
 from collections import namedtuple, OrderedDict
 
 
 CustomAttribute = namedtuple("CustomAttribute", ["name", "value"])
 
+_EXEC_PREFIX = "[exec] "
+
+# Job attributes holding lists, they are serialized separately.
+_JOB_LIST_ATTRIBUTES = {
+    "CustomAttributes",
+    "SubmitterParameters",
+    "WaitForPreIDs",
+}
+
 
 def get_rr_platform():
     # type: () -> Literal["windows", "linux", "osx"]
@@ -22,10 +33,34 @@ def get_rr_platform():
 
 
 class RREnvList(dict):
+    """Job environment with commands executed on render client.
+
+    Kept structured on the job and serialized only when submission
+    file is written.
+    """
+    def __init__(self, *args, **kwargs):
+        super(RREnvList, self).__init__(*args, **kwargs)
+        # `[exec]` directives in order they are executed
+        self.commands = []  # type: list[str]
+
+    def add_command(self, command):
+        # type: (str) -> None
+        """Add command executed by render client before rendering."""
+        self.commands.append(command)
+
+    def copy(self):
+        # type: () -> RREnvList
+        out = RREnvList(self)
+        out.commands = list(self.commands)
+        return out
+
     def serialize(self):
-        # <rrEnvList>VariableA=ValueA~~~VariableB=ValueB</rrEnvList>
-        return "~~~".join(
-            ["{}={}".format(k, v) for k, v in sorted(self.items())])
+        # <rrEnvList>VariableA=ValueA~~~[exec] command</rrEnvList>
+        items = ["{}={}".format(k, v) for k, v in sorted(self.items())]
+        items.extend(
+            "{}{}".format(_EXEC_PREFIX, command) for command in self.commands
+        )
+        return "~~~".join(items)
 
     @staticmethod
     def parse(data):
@@ -33,12 +68,24 @@ class RREnvList(dict):
         """Parse rrEnvList string and return it as RREnvList object."""
         out = RREnvList()
         for var in data.split("~~~"):
-            if "=" in var:
+            if var.startswith(_EXEC_PREFIX):
+                out.add_command(var[len(_EXEC_PREFIX):])
+            elif "=" in var:
                 k, v = var.split("=", maxsplit=1)
                 out[k] = v
         return out
 
 
+def _to_env_list(value):
+    # type: (Union[str, dict, None]) -> Optional[RREnvList]
+    """Convert environment passed to :class:`RRJob` to RREnvList."""
+    if value is None or isinstance(value, RREnvList):
+        return value
+    if isinstance(value, str):
+        return RREnvList.parse(value)
+    return RREnvList(value)
+
+
 @attr.s
 class RRJob(object):
     """Mapping of Royal Render job file to a data class."""
@@ -174,11 +221,35 @@ class RRJob(object):
 
     # Environment
     # only used in RR 8.3 and newer
-    rrEnvList = attr.ib(default=None, type=str)  # type: Optional[str]
+    rrEnvList = attr.ib(
+        default=None, converter=_to_env_list)  # type: Optional[RREnvList]
     rrEnvFile = attr.ib(default=None, type=str)  # type: Optional[str]
 
     CustomScriptFile = attr.ib(default=None)  # type: Optional[str]
 
+    # Jobs from the same submission this job has to wait for. They are
+    # resolved to `WaitForPreIDs` when PreIDs are assigned on submission.
+    _dependencies = attr.ib(
+        factory=list, eq=False, repr=False)  # type: list[RRJob]
+
+    @property
+    def dependencies(self):
+        # type: () -> list[RRJob]
+        """Jobs this job has to wait for."""
+        return list(self._dependencies)
+
+    def add_dependencies(self, *jobs):
+        # type: (RRJob) -> None
+        """Make this job wait for other jobs from the same submission.
+
+        Args:
+            *jobs (RRJob): Jobs this job depends on.
+
+        """
+        for job in jobs:
+            if all(job is not item for item in self._dependencies):
+                self._dependencies.append(job)
+
 
 class SubmitterParameter:
     """Wrapper for Submitter Parameters."""
@@ -204,6 +275,41 @@ class SubmitterParameter:
         return "{param}".format(
                 param=self._parameter)
 
+    @staticmethod
+    def parse(data):
+        # type: (str) -> SubmitterParameter
+        """Parse serialized submitter parameter string.
+
+        Args:
+            data (str): Parameter string like `foo=bar~baz~goo`.
+
+        Returns:
+            SubmitterParameter: Parsed parameter.
+
+        """
+        if "=" not in data:
+            return SubmitterParameter(data)
+        parameter, values = data.split("=", 1)
+        return SubmitterParameter(parameter, *values.split("~"))
+
+    @property
+    def name(self):
+        # type: () -> str
+        return self._parameter
+
+    @property
+    def values(self):
+        # type: () -> tuple[str, ...]
+        return tuple(self._values)
+
+    def __eq__(self, other):
+        if not isinstance(other, SubmitterParameter):
+            return NotImplemented
+        return self.serialize() == other.serialize()
+
+    def __repr__(self):
+        return "SubmitterParameter({!r})".format(self.serialize())
+
 
 @attr.s
 class SubmitFile(object):
@@ -223,92 +329,303 @@ class SubmitFile(object):
     # list item must be of type `RRJob`
     Jobs = attr.ib(factory=list)  # type: list
 
-    @staticmethod
-    def _process_submitter_parameters(parameters, dom, append_to):
-        # type: (list[SubmitterParameter], md.Document, md.Element) -> None
-        """Take list of :class:`SubmitterParameter` and process it as XML.
+    @classmethod
+    def parse(cls, source):
+        # type: (Union[str, IO]) -> SubmitFile
+        """Read submission XML file written by :meth:`write`.
 
-        This will take :class:`SubmitterParameter`, create XML element
-        for them and convert value to Royal Render compatible string
-        (options and values separated by ~)
+        File is parsed incrementally and elements are released as soon
+        as the job they belong to is created, so memory usage does not
+        grow with the amount of jobs.
+
+        Elements `Custom<Name>` are parsed to job attribute of the same
+        name only when they are in order of job attributes. Custom
+        attributes are written after job attributes, so element named as
+        job attribute which was already passed in the order is parsed to
+        `CustomAttributes`, e.g. `CustomAttribute("UserInfo", ...)` of job
+        without `CustomUserInfo`.
 
         Args:
-            parameters (list of SubmitterParameter): List of parameters.
-            dom (xml.dom.minidom.Document): XML Document
-            append_to (xml.dom.minidom.Element): Element to append to.
+            source (Union[str, IO]): Path to XML file or file object.
 
-        """
-        for param in parameters:
-            if not isinstance(param, SubmitterParameter):
-                raise AttributeError(
-                    "{} is not of type `SubmitterParameter`".format(param))
-            xml_parameter = dom.createElement("SubmitterParameter")
-            xml_parameter.appendChild(dom.createTextNode(param.serialize()))
-            append_to.appendChild(xml_parameter)
+        Returns:
+            SubmitFile: Submission with all jobs and parameters.
 
-    def serialize(self):
-        # type: () -> str
+        """
+        submit_file = cls()
+        root = None
+        job_data = None
+        attribute_parsers = _get_job_attribute_parsers(RRJob)
+        attribute_indexes = {
+            name: index
+            for index, name in enumerate(_get_job_serialization_plan(RRJob))
+        }
+        # index of the last job attribute in order of serialization
+        last_index = -1
+        for event, element in ElementTree.iterparse(
+                source, events=("start", "end")):
+            tag = element.tag
+            if event == "start":
+                if root is None:
+                    root = element
+                    submit_file.syntax_version = element.get(
+                        "syntax_version", submit_file.syntax_version)
+                elif tag == "Job":
+                    job_data = {
+                        "SubmitterParameters": [],
+                        "CustomAttributes": [],
+                        "WaitForPreIDs": [],
+                    }
+                    last_index = -1
+                continue
+
+            text = element.text or ""
+            if tag == "SubmitterParameter":
+                parameter = SubmitterParameter.parse(text)
+                if job_data is None:
+                    submit_file.SubmitterParameters.append(parameter)
+                else:
+                    job_data["SubmitterParameters"].append(parameter)
+
+            elif tag == "Job":
+                submit_file.Jobs.append(_create_job(job_data))
+                job_data = None
+                # release already processed elements
+                root.clear()
+
+            elif job_data is None:
+                continue
+
+            elif tag == "WaitForPreID":
+                job_data["WaitForPreIDs"].append(int(text))
+
+            elif (
+                tag in attribute_parsers
+                and attribute_indexes[tag] > last_index
+            ):
+                job_data[tag] = attribute_parsers[tag](text)
+                last_index = attribute_indexes[tag]
+
+            elif tag.startswith("Custom"):
+                job_data["CustomAttributes"].append(
+                    CustomAttribute(tag[len("Custom"):], text))
+
+        return submit_file
+
+    def serialize(self, compact=False):
+        # type: (bool) -> str
         """Return all data serialized as XML.
 
+        Args:
+            compact (bool): Skip indentation and new lines.
+
         Returns:
             str: XML data as string.
 
         """
-        def filter_data(a, v):
-            """Skip private attributes."""
-            if a.name.startswith("_"):
-                return False
-            if v is None:
-                return False
-            return True
-
-        root = md.Document()
+        stream = io.StringIO()
+        self.write(stream, compact=compact)
+        return stream.getvalue()
+
+    def write(self, fileobj, compact=False):
+        # type: (IO[str], bool) -> None
+        """Write all data as XML directly to file object.
+
+        Elements are written one by one as they are processed so the whole
+        document is never held in memory. Default output is the same as
+        the one produced by `xml.dom.minidom` pretty printing with tabs.
+
+        Args:
+            fileobj (IO[str]): Text file object to write to.
+            compact (bool): Skip indentation and new lines.
+
+        """
+        newline = "" if compact else "\n"
+        indent = "" if compact else "\t"
+
+        fileobj.write('<?xml version="1.0" ?>{}'.format(newline))
         # root element: <RR_Job_File syntax_version="6.0">
-        job_file = root.createElement('RR_Job_File')
-        job_file.setAttribute("syntax_version", self.syntax_version)
+        root_tag = '<RR_Job_File syntax_version="{}"'.format(
+            _escape(self.syntax_version))
+        if not self.SubmitterParameters and not self.Jobs:
+            fileobj.write("{}/>{}".format(root_tag, newline))
+            return
+        fileobj.write("{}>{}".format(root_tag, newline))
 
         # handle Submitter Parameters for batch
         # <SubmitterParameter>foo=bar~baz~goo</SubmitterParameter>
-        self._process_submitter_parameters(
-            self.SubmitterParameters, root, job_file)
-        root.appendChild(job_file)
+        self._write_submitter_parameters(
+            fileobj, self.SubmitterParameters, indent, newline)
+
         for job in self.Jobs:  # type: RRJob
             if not isinstance(job, RRJob):
                 raise AttributeError(
-                    "{} is not of type `SubmitterParameter`".format(job))
-            xml_job = root.createElement("Job")
-            # handle Submitter Parameters for job
-            self._process_submitter_parameters(
-                job.SubmitterParameters, root, xml_job
+                    "{} is not of type `RRJob`".format(job))
+            self._write_job(fileobj, job, indent, newline)
+
+        fileobj.write("</RR_Job_File>{}".format(newline))
+
+    @staticmethod
+    def _write_submitter_parameters(fileobj, parameters, indent, newline):
+        # type: (IO[str], list[SubmitterParameter], str, str) -> None
+        """Take list of :class:`SubmitterParameter` and write it as XML.
+
+        This will take :class:`SubmitterParameter`, write XML element
+        for them and convert value to Royal Render compatible string
+        (options and values separated by ~)
+
+        Args:
+            fileobj (IO[str]): Text file object to write to.
+            parameters (list of SubmitterParameter): List of parameters.
+            indent (str): Indentation of the elements.
+            newline (str): New line string.
+
+        """
+        for param in parameters:
+            if not isinstance(param, SubmitterParameter):
+                raise AttributeError(
+                    "{} is not of type `SubmitterParameter`".format(param))
+            _write_element(
+                fileobj, "SubmitterParameter", param.serialize(),
+                indent, newline
             )
-            job_custom_attributes = job.CustomAttributes
-
-            serialized_job = attr.asdict(
-                job, dict_factory=OrderedDict, filter=filter_data)
-            serialized_job.pop("CustomAttributes")
-            serialized_job.pop("SubmitterParameters")
-            # we are handling `WaitForPreIDs` separately.
-            wait_pre_ids = serialized_job.pop("WaitForPreIDs", [])
-
-            for custom_attr in job_custom_attributes:  # type: CustomAttribute
-                serialized_job["Custom{}".format(
-                    custom_attr.name)] = custom_attr.value
-
-            for item, value in serialized_job.items():
-                xml_attr = root.createElement(item)
-                xml_attr.appendChild(
-                    root.createTextNode(str(value))
-                )
-                xml_job.appendChild(xml_attr)
-
-            # WaitForPreID - can be used multiple times
-            for pre_id in wait_pre_ids:
-                xml_attr = root.createElement("WaitForPreID")
-                xml_attr.appendChild(
-                    root.createTextNode(str(pre_id))
-                )
-                xml_job.appendChild(xml_attr)
-
-            job_file.appendChild(xml_job)
-
-        return root.toprettyxml(indent="\t")
+
+    def _write_job(self, fileobj, job, indent, newline):
+        # type: (IO[str], RRJob, str, str) -> None
+        """Write single job element.
+
+        Args:
+            fileobj (IO[str]): Text file object to write to.
+            job (RRJob): Job to write.
+            indent (str): Indentation of the job element.
+            newline (str): New line string.
+
+        """
+        fileobj.write("{}<Job>{}".format(indent, newline))
+        child_indent = indent * 2
+
+        # handle Submitter Parameters for job
+        self._write_submitter_parameters(
+            fileobj, job.SubmitterParameters, child_indent, newline)
+
+        # custom attributes with the same name as job attribute replace
+        # its value, the rest is written after job attributes
+        custom_attributes = OrderedDict(
+            ("Custom{}".format(custom_attr.name), custom_attr.value)
+            for custom_attr in job.CustomAttributes
+        )
+        for name in _get_job_serialization_plan(type(job)):
+            value = getattr(job, name)
+            if value is None:
+                continue
+            if name in custom_attributes:
+                value = custom_attributes.pop(name)
+            elif isinstance(value, RREnvList):
+                value = value.serialize()
+            _write_element(fileobj, name, str(value), child_indent, newline)
+
+        for name, value in custom_attributes.items():
+            _write_element(fileobj, name, str(value), child_indent, newline)
+
+        # WaitForPreID - can be used multiple times
+        for pre_id in job.WaitForPreIDs:
+            _write_element(
+                fileobj, "WaitForPreID", str(pre_id), child_indent, newline)
+
+        fileobj.write("{}</Job>{}".format(indent, newline))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_job_serialization_plan(job_class):
+    # type: (type) -> tuple[str, ...]
+    """Get names of job attributes written as simple elements.
+
+    Order of the attributes and skipped attributes are resolved only once
+    per class so serialization of each job is just a loop over them.
+
+    Args:
+        job_class (type): Class of the job, :class:`RRJob` or its subclass.
+
+    Returns:
+        tuple[str, ...]: Attribute names in order of serialization.
+
+    """
+    return tuple(
+        field.name
+        for field in attr.fields(job_class)
+        if not field.name.startswith("_")
+        and field.name not in _JOB_LIST_ATTRIBUTES
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_job_attribute_parsers(job_class):
+    # type: (type) -> dict[str, Callable[[str], Any]]
+    """Get functions converting XML text to job attribute values.
+
+    Args:
+        job_class (type): Class of the job, :class:`RRJob` or its subclass.
+
+    Returns:
+        dict[str, Callable[[str], Any]]: Parser by attribute name.
+
+    """
+    return {
+        name: _JOB_ATTRIBUTE_PARSERS.get(name, str)
+        for name in _get_job_serialization_plan(job_class)
+    }
+
+
+def _create_job(job_data):
+    # type: (dict[str, Any]) -> RRJob
+    """Create job from parsed data.
+
+    Required attributes that were not in the file are set to `None`,
+    same as they were before serialization.
+    """
+    for field in attr.fields(RRJob):
+        if field.default is attr.NOTHING and field.name not in job_data:
+            job_data[field.name] = None
+    return RRJob(**job_data)
+
+
+def _parse_bool(text):
+    # type: (str) -> bool
+    return text.lower() in {"true", "1", "yes"}
+
+
+# Conversion of XML text to job attribute values. Attributes not listed
+# here are kept as strings.
+_JOB_ATTRIBUTE_PARSERS = {
+    "IsActive": _parse_bool,
+    "SeqStart": int,
+    "SeqEnd": int,
+    "SeqStep": int,
+    "SeqFileOffset": int,
+    "ImageSingleOutputFile": _parse_bool,
+    "ImageWidth": int,
+    "ImageHeight": int,
+    "ImageFramePadding": int,
+    "PreID": int,
+    "Color_ID": int,
+    "Priority": int,
+    "TotalFrames": int,
+}
+
+
+def _escape(text):
+    # type: (str) -> str
+    """Escape text for XML the same way `xml.dom.minidom` does."""
+    return (
+        text.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace("\"", "&quot;")
+        .replace(">", "&gt;")
+    )
+
+
+def _write_element(fileobj, tag, text, indent, newline):
+    # type: (IO[str], str, str, str, str) -> None
+    """Write element with single text node."""
+    fileobj.write("{indent}<{tag}>{text}</{tag}>{newline}".format(
+        indent=indent, tag=tag, text=_escape(text), newline=newline))
@@ -1,10 +1,15 @@
 import argparse
+import hashlib
 import json
 import os
+import re
+import socket
 import subprocess
 import sys
 import tempfile
+import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
 import platform
 
@@ -16,6 +21,132 @@ import rrJob  # noqa: E402
 
 logs = []
 
+# Marker of structured log lines, see `ayon_inject_stats.py`
+LOG_SOURCE = "ayon_inject_envvar"
+# Fields added to every structured log line
+log_fields = {"worker": socket.gethostname()}
+
+# Worker-local folder to cache job data fetched from RR server, later
+# preprocess scripts of the same job reuse it. Not used when not set.
+JOB_CACHE_DIR_ENV = "AYON_RR_JOB_CACHE_DIR"
+# Seconds for which cached job data are used
+JOB_CACHE_TTL = 24 * 60 * 60
+
+# Worker-local folder with extracted environments, temp folder is used
+# when not set
+ENV_CACHE_DIR_ENV = "AYON_RR_ENV_CACHE_DIR"
+# Optional folder shared by workers with extracted environments
+ENV_SHARED_CACHE_DIR_ENV = "AYON_RR_ENV_SHARED_CACHE_DIR"
+# Seconds for which extracted environments are used, 0 disables cache.
+# Cache is keyed only by bundle, server, context and platform, changes of
+# studio or project settings are not picked up until it expires, so it is
+# disabled unless enabled on the worker.
+ENV_CACHE_TTL_ENV = "AYON_RR_ENV_CACHE_TTL"
+ENV_CACHE_TTL = 0
+# Seconds after which lock of extraction is considered abandoned
+ENV_CACHE_LOCK_TIMEOUT = 10 * 60
+
+# Job variable with path to farm environment resolved at submission
+FARM_ENV_FILE_KEY = "AYON_RR_FARM_ENV_FILE"
+# Seconds after which resolved farm environment is not used
+FARM_ENV_MAX_AGE_ENV = "AYON_RR_FARM_ENV_MAX_AGE"
+FARM_ENV_MAX_AGE = 7 * 24 * 60 * 60
+
+# Job variable with minimal amount of GPUs of render client
+MIN_GPUS_KEY = "AYON_RR_MIN_GPUS"
+# Variable set by RoyalRender with GPUs installed on render client
+GPUS_INSTALLED_ENV = "GPUsInstalledList"
+
+# Environment variables never written to logs, RR client log is readable
+# by everyone in rrControl
+SECRET_ENV_NAMES = {"AYON_API_KEY"}
+SECRET_ENV_SUFFIXES = ("_KEY", "_TOKEN", "_PASSWORD")
+REDACTED = "***"
+# Shorter values are not replaced in log messages, it would mangle them
+SECRET_MIN_LENGTH = 4
+
+
+def is_secret(name):
+    """Environment variable holds secret which must not be logged."""
+    name = str(name).upper()
+    return name in SECRET_ENV_NAMES or name.endswith(SECRET_ENV_SUFFIXES)
+
+
+def _get_secret_values():
+    return {
+        value
+        for key, value in os.environ.items()
+        if is_secret(key) and len(value) >= SECRET_MIN_LENGTH
+    }
+
+
+def redact(value, secrets=None):
+    """Replace secrets in value before it is logged.
+
+    Values of secret keys in dictionaries are replaced and values of
+    secret environment variables are replaced anywhere in strings.
+    """
+    if secrets is None:
+        secrets = _get_secret_values()
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if is_secret(key) else redact(item, secrets)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple, set)):
+        return [redact(item, secrets) for item in value]
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", errors="replace")
+    if isinstance(value, str):
+        for secret in secrets:
+            value = value.replace(secret, REDACTED)
+    return value
+
+
+def log(message):
+    """Log message, it is printed as JSON line to RR client log at once."""
+    message = redact(message)
+    logs.append(message)
+    log_event("message", message=message)
+
+
+def log_event(event, **data):
+    """Print structured log line to stdout, secrets are redacted."""
+    record = {
+        "source": LOG_SOURCE,
+        "time": datetime.utcnow().isoformat() + "Z",
+        "event": event,
+    }
+    record.update(log_fields)
+    record.update(data)
+    print(json.dumps(redact(record), default=str), flush=True)
+
+
+@contextmanager
+def phase(name, timings):
+    """Measure wall-clock duration of phase of the injection."""
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        timings[name] = timings.get(name, 0.0) + duration
+        log_event(
+            "phase", phase=name, duration=round(duration, 4), status=status)
+
+
+class ClientRequirementError(Exception):
+    """Render client doesn't meet requirements of the job.
+
+    Only the client fails the job, job itself stays enabled so other
+    clients can render it.
+    """
+    pass
+
 
 class InjectEnvironment:
     """Creates rrEnv file.
@@ -46,12 +177,39 @@ class InjectEnvironment:
     Scripts logs into folder with metadata json - could be removed if there
     is a way how to log into RR output.
 
+    Job is fetched from RR server only once, optionally it is cached in
+    folder set by `AYON_RR_JOB_CACHE_DIR` so other preprocess scripts of
+    the same job on the worker don't need to connect to RR server at all.
+
     """
 
     def __init__(self):
         self.meta_dir = None
-        self.tcp = self.tcp_connect()
-        self.job = self._get_job()
+        # duration of phases in seconds
+        self.timings = {}
+        # "resolved", "cache" or "extracted"
+        self.env_source = None
+        self.status = None
+        self.args = self._parse_args()
+        self.jid = int(self.args.jid)
+        log_fields["jid"] = self.jid
+        self._tcp = None
+        self._job_info = None
+        self._job_envs = None
+
+    @property
+    def tcp(self):
+        if self._tcp is None:
+            with phase("tcp_connect", self.timings):
+                self._tcp = self.tcp_connect()
+        return self._tcp
+
+    @property
+    def job_info(self):
+        """Values of job used by the script."""
+        if self._job_info is None:
+            self._job_info = self._get_job_info()
+        return self._job_info
 
     def tcp_connect(self):
         tcp = rr_connect.server_connect(user_name=None)
@@ -63,35 +221,63 @@ class InjectEnvironment:
 
     def inject(self):
         # TODO logging only in RR not to file?
-        logs.append("InjectEnvironment starting")
+        log("InjectEnvironment starting")
         meta_dir = self._get_metadata_dir()
         self.meta_dir = meta_dir
         envs = self._get_job_environments()
 
+        log_fields["bundle"] = envs.get("AYON_BUNDLE_NAME")
+
         if not envs.get("AYON_RENDER_JOB"):
-            logs.append("Not a ayon render job, skipping.")
+            log("Not a ayon render job, skipping.")
+            self.status = "skipped"
             return
 
-        self._check_launch_environemnt()
+        self._check_gpus()
+
+        with phase("resolved_env", self.timings):
+            extracted_env = self._get_resolved_environments()
+        if extracted_env is not None:
+            self.env_source = "resolved"
+        else:
+            self._check_launch_environemnt()
 
-        context = self._get_context()
+            context = self._get_context()
 
-        logs.append("context {}".format(context))
-        executable = self._get_executable()
+            log("context {}".format(context))
+            executable = self._get_executable()
 
-        logs.append("executable {}".format(executable))
+            log("executable {}".format(executable))
 
-        extracted_env = self._extract_environments(executable, context)
+            extracted_env = self._get_extracted_environments(
+                executable, context)
 
-        rrEnv_path = self._create_rrEnv(meta_dir, extracted_env)
+        with phase("write_rrenv", self.timings):
+            rrEnv_path = self._create_rrEnv(
+                meta_dir, extracted_env, self.args.filepath)
+        self.status = "ok"
         print(f"Ayon job environment exported to rrEnv file:\n{rrEnv_path}")
-        logs.append(f"InjectEnvironment ending, rrEnv file {rrEnv_path}")
+        log(f"InjectEnvironment ending, rrEnv file {rrEnv_path}")
+
+    def _check_gpus(self):
+        """Fail on client with less GPUs than the job requires."""
+        required = int(self._get_job_environments().get(MIN_GPUS_KEY) or 0)
+        if not required:
+            return
+        installed = os.environ.get(GPUS_INSTALLED_ENV)
+        if installed is None:
+            log(f"{GPUS_INSTALLED_ENV} is not set, GPUs are not checked")
+            return
+        count = len([gpu for gpu in re.split(r"[\s,;]+", installed) if gpu])
+        if count < required:
+            raise ClientRequirementError(
+                f"Job requires {required} GPU(s), client has {count}")
 
     def _get_metadata_dir(self):
         """Get folder where metadata.json and renders should be produced."""
-        new_path = self.job.imageDir
+        new_path = self.job_info["imageDir"]
 
-        logs.append(f"_get_metadata_dir::{new_path}")
+        log(f"_get_metadata_dir::{new_path}")
         return new_path
 
     def _check_launch_environemnt(self):
@@ -105,7 +291,7 @@ class InjectEnvironment:
             msg = (
                 f"Required environment variable missing: '{','.join(missing)}"
             )
-            logs.append(msg)
+            log(msg)
             raise RuntimeError(msg)
 
     def _get_context(self):
@@ -118,40 +304,87 @@ class InjectEnvironment:
             "envgroup": "farm",
         }
 
-    def _get_job(self):
-        logs.append("get_jobs")
+    @staticmethod
+    def _parse_args():
         parser = argparse.ArgumentParser()
         parser.add_argument("-jid")
         parser.add_argument(
             "filepath",
             help="Where script file with environment will be saved"
         )
-        args = parser.parse_args()
+        return parser.parse_args()
 
-        jid = int(args.jid)
-        if not self.tcp.jobList_GetInfo(jid):
+    def _get_job(self):
+        log("get_jobs")
+        if not self.tcp.jobList_GetInfo(self.jid):
             msg = "Error jobList_GetInfo: " + self.tcp.errorMessage()
             print(msg)
             raise RuntimeError(msg)
-        job = self.tcp.jobs.getJobSend(jid)
+        job = self.tcp.jobs.getJobSend(self.jid)
         self.tcp.jobs.setPathTargetOS(job.sceneOS)
 
         return job
 
+    def _get_job_info(self):
+        cache_path = self._get_job_cache_path()
+        job_info = self._load_job_cache(cache_path)
+        if job_info is not None:
+            log(f"Using cached job {cache_path}")
+            return job_info
+
+        # connect outside of job fetch timing
+        self.tcp
+        with phase("job_fetch", self.timings):
+            job = self._get_job()
+        job_info = {
+            "imageDir": job.imageDir,
+            "rrEnvList": job.customData_Str("rrEnvList"),
+        }
+        self._save_job_cache(cache_path, job_info)
+        return job_info
+
+    def _get_job_cache_path(self):
+        cache_dir = os.environ.get(JOB_CACHE_DIR_ENV)
+        if not cache_dir:
+            return None
+        return os.path.join(cache_dir, f"job_{self.jid}.json")
+
+    @staticmethod
+    def _load_job_cache(cache_path):
+        if not cache_path:
+            return None
+        try:
+            if time.time() - os.path.getmtime(cache_path) > JOB_CACHE_TTL:
+                return None
+            with open(cache_path) as stream:
+                return json.load(stream)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_job_cache(cache_path, job_info):
+        if cache_path:
+            _write_json_atomic(cache_path, job_info)
+
     def _get_job_environments(self):
         """Gets environments set on job.
 
         It seems that it is not possible to query "rrEnvList" on job directly,
         it must be parsed from .json document.
+
+        Environments are parsed only once.
         """
-        job = self._get_job()
-        env_list = job.customData_Str("rrEnvList")
+        if self._job_envs is not None:
+            return self._job_envs
+
+        env_list = self.job_info["rrEnvList"]
         envs = {}
         for env in env_list.split("~~~"):
             if "=" in env:
                 key, value = env.split("=", 1)
                 envs[key] = value
 
+        self._job_envs = envs
         return envs
 
     def _get_executable(self):
@@ -166,7 +399,8 @@ class InjectEnvironment:
             "AYON_API_KEY": os.environ["AYON_API_KEY"],
             "AYON_BUNDLE_NAME": job_envs["AYON_BUNDLE_NAME"],
         }
-        logs.append("Ayon launch environments:: {}".format(ayon_environment))
+        log("Ayon launch environments:: {}".format(
+            redact(ayon_environment)))
         environment = os.environ.copy()
         environment.update(ayon_environment)
         return environment
@@ -198,25 +432,152 @@ class InjectEnvironment:
 
         environments = self._get_launch_environments()
 
-        logs.append("Running:: {}".format(args))
-        proc = subprocess.Popen(
-            args,
-            env=environments,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        output, error = proc.communicate()
+        log("Running:: {}".format(args))
+        with phase("extract_environments", self.timings):
+            proc = subprocess.Popen(
+                args,
+                env=environments,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            output, error = proc.communicate()
+        self.env_source = "extracted"
 
         if not os.path.exists(export_path):
-            logs.append("output::{}".format(output))
-            logs.append("error::{}".format(error))
+            log("output::{}".format(output))
+            log("error::{}".format(error))
             raise RuntimeError("Extract failed with {}".format(error))
 
         with open(export_path) as json_file:
             return json.load(json_file)
 
-    def _create_rrEnv(self, meta_dir, extracted_env):
-        """Create rrEnv.rrEnv file in metadata folder that render job points"""
+    def _get_resolved_environments(self):
+        """Farm environment resolved at submission and shipped with job.
+
+        Returns None when job has no resolved environment or it is stale,
+        environment must be extracted then.
+        """
+        job_envs = self._get_job_environments()
+        path = job_envs.get(FARM_ENV_FILE_KEY)
+        if not path:
+            return None
+
+        max_age = float(
+            os.environ.get(FARM_ENV_MAX_AGE_ENV, FARM_ENV_MAX_AGE))
+        try:
+            if time.time() - os.path.getmtime(path) > max_age:
+                log(f"Resolved environment is too old {path}")
+                return None
+            with open(path) as stream:
+                data = json.load(stream)
+        except (OSError, ValueError) as exc:
+            log(f"Resolved environment not available {path}: {exc}")
+            return None
+
+        platform_name = platform.system().lower()
+        if data.get("platform") != platform_name:
+            log(
+                f"Resolved environment is for {data.get('platform')}, "
+                f"not {platform_name}"
+            )
+            return None
+        # Bundle of the file comes from the same job environment, worker
+        # has nothing of its own to compare it with. Staleness is limited
+        # only by `AYON_RR_FARM_ENV_MAX_AGE`.
+
+        log(f"Using resolved environment {path}")
+        return data["env"]
+
+    def _get_extracted_environments(self, executable, context):
+        """Extract environments or reuse them from cache.
+
+        When `AYON_RR_ENV_CACHE_TTL` is set, extracted environments are
+        cached by hash of bundle, context and platform on worker and
+        optionally in folder shared by workers. Lock makes sure concurrent
+        jobs on worker don't extract the same environments.
+        """
+        ttl = float(os.environ.get(ENV_CACHE_TTL_ENV, ENV_CACHE_TTL))
+        if ttl <= 0:
+            return self._extract_environments(executable, context)
+
+        cache_dirs = [
+            os.environ.get(ENV_CACHE_DIR_ENV)
+            or os.path.join(tempfile.gettempdir(), "ayon_rr_env_cache")
+        ]
+        shared_dir = os.environ.get(ENV_SHARED_CACHE_DIR_ENV)
+        if shared_dir:
+            cache_dirs.append(shared_dir)
+
+        cache_key = self._get_env_cache_key(context)
+        cache_paths = [
+            os.path.join(cache_dir, f"{cache_key}.json")
+            for cache_dir in cache_dirs
+        ]
+        with phase("env_cache", self.timings):
+            extracted_env = self._load_env_cache(cache_paths, ttl)
+        if extracted_env is not None:
+            self.env_source = "cache"
+            return extracted_env
+
+        lock_path = f"{cache_paths[0]}.lock"
+        with _EnvCacheLock(lock_path) as lock:
+            self.timings["env_cache_lock"] = lock.waited
+            log_event(
+                "phase",
+                phase="env_cache_lock",
+                duration=round(lock.waited, 4),
+                status="ok",
+            )
+            # other job might have extracted it while waiting for lock
+            extracted_env = self._load_env_cache(cache_paths, ttl)
+            if extracted_env is not None:
+                self.env_source = "cache"
+                return extracted_env
+
+            extracted_env = self._extract_environments(executable, context)
+            for cache_path in cache_paths:
+                _write_json_atomic(cache_path, extracted_env)
+        return extracted_env
+
+    def _get_env_cache_key(self, context):
+        job_envs = self._get_job_environments()
+        data = dict(context)
+        data.update({
+            "bundle": job_envs["AYON_BUNDLE_NAME"],
+            "server": os.environ["AYON_SERVER_URL"],
+            "platform": platform.system().lower(),
+        })
+        return hashlib.sha256(
+            json.dumps(data, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def _load_env_cache(cache_paths, ttl):
+        """Load environments from first valid cache, local cache is filled
+        from shared one."""
+        for index, cache_path in enumerate(cache_paths):
+            try:
+                if time.time() - os.path.getmtime(cache_path) > ttl:
+                    continue
+                with open(cache_path) as stream:
+                    extracted_env = json.load(stream)
+            except (OSError, ValueError):
+                continue
+            log(f"Using cached environments {cache_path}")
+            if index > 0:
+                _write_json_atomic(cache_paths[0], extracted_env)
+            return extracted_env
+        return None
+
+    def _create_rrEnv(self, meta_dir, extracted_env, filepath=None):
+        """Create rrEnv file that render job points to.
+
+        File is written next to `filepath` with extension for current
+        platform, `rrEnv` in metadata folder is used without `filepath`.
+        Existing file with the same content is kept as is, otherwise it is
+        replaced atomically so clients already using it never read partial
+        file.
+        """
         filter_out = os.environ.get("AYON_FILTER_ENVIRONMENTS")
         filter_envs = set()
         if filter_out:
@@ -244,12 +605,96 @@ class InjectEnvironment:
             line = f"{env_command} {key}={value}"
             lines.append(line)
 
-        rrenv_path = os.path.join(meta_dir, f"rrEnv.{ext}")
+        if filepath:
+            rrenv_path = f"{os.path.splitext(filepath)[0]}.{ext}"
+        else:
+            rrenv_path = os.path.join(meta_dir, f"rrEnv.{ext}")
+        rrenv_path = os.path.normpath(rrenv_path)
+
+        content = "".join(s + "\n" for s in lines)
+        content_hash = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        try:
+            with open(rrenv_path) as fp:
+                existing_hash = hashlib.sha1(
+                    fp.read().encode("utf-8")).hexdigest()
+        except OSError:
+            existing_hash = None
+
+        if existing_hash == content_hash:
+            log(f"rrEnv file is up to date {rrenv_path}")
+            return rrenv_path
 
-        with open(rrenv_path, "w") as fp:
-            fp.writelines(s + "\n" for s in lines)
+        tmp_path = f"{rrenv_path}.{content_hash[:12]}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as fp:
+            fp.write(content)
+        os.replace(tmp_path, rrenv_path)
+
+        return rrenv_path
+
+
+class _EnvCacheLock:
+    """Lock file held while environments for cache key are extracted.
+
+    Waits until lock is released, abandoned lock is taken over after
+    `ENV_CACHE_LOCK_TIMEOUT` seconds.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._locked = False
+        # seconds spent waiting for the lock
+        self.waited = 0.0
+
+    def __enter__(self):
+        start = time.perf_counter()
+        try:
+            return self._acquire()
+        finally:
+            self.waited = time.perf_counter() - start
+
+    def _acquire(self):
+        while True:
+            try:
+                os.makedirs(os.path.dirname(self._path), exist_ok=True)
+                fd = os.open(
+                    self._path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    age = time.time() - os.path.getmtime(self._path)
+                    if age > ENV_CACHE_LOCK_TIMEOUT:
+                        os.remove(self._path)
+                except OSError:
+                    pass
+                time.sleep(0.5)
+                continue
+            except OSError as exc:
+                # cache folder is not writable, extract without lock
+                log(f"Environment cache lock failed: {exc}")
+                return self
+            os.write(fd, str(os.getpid()).encode("utf-8"))
+            os.close(fd)
+            self._locked = True
+            return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._locked:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+
+
+def _write_json_atomic(path, data):
+    """Write json file so readers never see partial content."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as stream:
+            json.dump(data, stream)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        log(f"Cache file not written {path}: {exc}")
 
-        return os.path.normpath(rrenv_path)
 
 # TODO move to Settings
 env_denied_windows: set[str] = {
@@ -512,23 +957,45 @@ env_denied_dict = {
 
 
 if __name__ == "__main__":
+    start = time.perf_counter()
+    injector = None
     try:
         tmpdir = None
         injector = InjectEnvironment()
 
         injector.inject()
         tmpdir = injector.meta_dir
+    except ClientRequirementError as exp:
+        injector.status = "rejected"
+        raise Exception(redact(f"Error happened::{str(exp)}"))
     except Exception as exp:
-        msg = f"Error happened::{str(exp)}"
-        jobsApply = []
-        jobsApply.append(injector.job.ID)
-        if not injector.tcp.jobSendCommand(
-            jobsApply, rrJob._LogMessage.lDisable, 0
-        ):
-            print("Error jobSendCommand: " + injector.tcp.errorMessage())
+        msg = redact(f"Error happened::{str(exp)}")
+        if injector is not None:
+            injector.status = "error"
+            # disable job only over existing connection, connecting from
+            # here could hang or fail again when server is not reachable
+            tcp = getattr(injector, "_tcp", None)
+            if tcp is not None:
+                jobsApply = []
+                jobsApply.append(injector.jid)
+                if not tcp.jobSendCommand(
+                    jobsApply, rrJob._LogMessage.lDisable, 0
+                ):
+                    print("Error jobSendCommand: " + tcp.errorMessage())
         raise Exception(msg) or sys.exit()
 
     finally:
+        log_event(
+            "inject_finished",
+            status=injector.status if injector else "error",
+            duration=round(time.perf_counter() - start, 4),
+            env_source=injector.env_source if injector else None,
+            timings={
+                key: round(value, 4)
+                for key, value in (
+                    injector.timings if injector else {}).items()
+            },
+        )
         if tmpdir is None:
             temp_file = tempfile.NamedTemporaryFile(delete=False)
             log_path = temp_file.name
@@ -0,0 +1,121 @@
+"""Summarize duration of environment injection from RoyalRender logs.
+
+Reads structured lines printed by `ayon_inject_envvar.py` from RR client
+logs and prints p50/p95 of injection time per worker and per bundle.
+
+Usage:
+    python ayon_inject_stats.py <log file or folder> [...] [--phase NAME]
+
+Without paths lines are read from stdin. Durations of single phase
+(e.g. `extract_environments`) are summarized with `--phase`.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from collections import defaultdict
+
+LOG_SOURCE = "ayon_inject_envvar"
+
+
+def iter_log_files(paths):
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, _, filenames in os.walk(path):
+            for filename in sorted(filenames):
+                yield os.path.join(root, filename)
+
+
+def iter_records(lines):
+    """Yield finished injection records from log lines.
+
+    RR client prefixes lines of its log, JSON is looked up from the first
+    curly bracket.
+    """
+    for line in lines:
+        start = line.find("{")
+        if start < 0:
+            continue
+        try:
+            record = json.loads(line[start:])
+        except ValueError:
+            continue
+        if (
+            isinstance(record, dict)
+            and record.get("source") == LOG_SOURCE
+            and record.get("event") == "inject_finished"
+        ):
+            yield record
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of sorted values."""
+    index = max(0, math.ceil(percent / 100.0 * len(values)) - 1)
+    return values[index]
+
+
+def summarize(records, phase=None):
+    """Durations grouped by worker and by bundle.
+
+    Returns:
+        dict[str, dict[str, list[float]]]: Sorted durations by group name
+            and group value.
+    """
+    groups = {"worker": defaultdict(list), "bundle": defaultdict(list)}
+    for record in records:
+        if phase:
+            duration = record.get("timings", {}).get(phase)
+        else:
+            duration = record.get("duration")
+        if duration is None:
+            continue
+        for group, durations in groups.items():
+            durations[str(record.get(group))].append(float(duration))
+
+    for durations in groups.values():
+        for values in durations.values():
+            values.sort()
+    return groups
+
+
+def print_summary(groups, stream=sys.stdout):
+    for group, durations in groups.items():
+        stream.write("\nBy {}:\n".format(group))
+        stream.write("{:<40} {:>6} {:>9} {:>9}\n".format(
+            group, "count", "p50 [s]", "p95 [s]"))
+        for name, values in sorted(durations.items()):
+            stream.write("{:<40} {:>6} {:>9.2f} {:>9.2f}\n".format(
+                name,
+                len(values),
+                percentile(values, 50),
+                percentile(values, 95),
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "paths", nargs="*", help="RR client log files or folders")
+    parser.add_argument(
+        "--phase", help="Summarize duration of this phase only")
+    args = parser.parse_args()
+
+    records = []
+    if not args.paths:
+        records.extend(iter_records(sys.stdin))
+    for path in iter_log_files(args.paths):
+        with open(path, errors="replace") as stream:
+            records.extend(iter_records(stream))
+
+    if not records:
+        print("No injection records found.")
+        return
+    print("Injection records: {}".format(len(records)))
+    print_summary(summarize(records, args.phase))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Assemble tiles rendered by separate RoyalRender jobs.
+
+Script is executed by tile assembly job through `ayon_console run` so
+OpenImageIO tools distributed with AYON are available.
+
+It reads .json file written on submission:
+{
+    "width": 1920,
+    "height": 1080,
+    "files": [
+        {
+            "output": "/path/to/render.1001.exr",
+            "tiles": [
+                {
+                    "path": "/path/_tile0/to/render.1001.exr",
+                    "region": [0, 0, 960, 1080]
+                },
+                {
+                    "path": "/path/_tile1/to/render.1001.exr",
+                    "region": [960, 0, 960, 1080]
+                }
+            ]
+        }
+    ]
+}
+
+Region is `[x, y, width, height]` of the tile with origin in top left
+corner. Region of each tile is cut out of its file and pasted over the
+image, so pixels rendered outside of the region don't affect the result
+and all passes (not only beauty) are assembled correctly.
+
+Frame numbers in paths can be replaced by `#` padding, all frames of the
+job are then assembled.
+"""
+import argparse
+import json
+import os
+import re
+
+from ayon_core.lib import get_oiio_tool_args, run_subprocess
+
+
+def get_frames():
+    """Frames of the job from environment set by RoyalRender."""
+    start = int(os.environ.get("rrJobSeqStart", 1))
+    end = int(os.environ.get("rrJobSeqEnd", start))
+    step = int(os.environ.get("rrJobSeqStep", 1))
+    return range(start, end + 1, step)
+
+
+def format_frame(path, frame):
+    """Replace last `#` padding in path by frame number."""
+    match = None
+    for match in re.finditer(r"#+", path):
+        pass
+    if match is None:
+        return path
+    padding = match.end() - match.start()
+    return "{}{}{}".format(
+        path[:match.start()], str(frame).zfill(padding), path[match.end():]
+    )
+
+
+def assemble_file(output, tiles):
+    """Paste region of each tile into output file.
+
+    The first tile is used as the base image, its data window is
+    expanded to its full (display) window by `--croptofull`, so tiles
+    written with cropped data window still produce full image. Channels
+    and metadata of the output match tiles.
+    """
+    missing = [
+        tile["path"] for tile in tiles if not os.path.exists(tile["path"])
+    ]
+    if missing:
+        raise RuntimeError("Missing tiles: {}".format(", ".join(missing)))
+
+    args = get_oiio_tool_args("oiiotool")
+    args.extend([tiles[0]["path"], "--croptofull"])
+    for tile in tiles:
+        x, y, width, height = tile["region"]
+        args.extend([
+            tile["path"],
+            "--cut", "{}x{}+{}+{}".format(width, height, x, y),
+            "--paste", "+{}+{}".format(x, y),
+        ])
+    args.extend(["-o", output])
+    print("Assembling: {}".format(output))
+    run_subprocess(args)
+
+
+def assemble(config_path):
+    with open(config_path) as f:
+        config = json.load(f)
+
+    for item in config["files"]:
+        output = item["output"]
+        tiles = item["tiles"]
+        if "#" not in output:
+            assemble_file(output, tiles)
+            continue
+
+        for frame in get_frames():
+            assemble_file(
+                format_frame(output, frame),
+                [
+                    dict(tile, path=format_frame(tile["path"], frame))
+                    for tile in tiles
+                ]
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assemble rendered tiles")
+    parser.add_argument("config", help="Path to tile assembly .json file")
+    args = parser.parse_args()
+
+    assemble(args.config)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""Compact representation of rendered image sequences."""
+import functools
+import itertools
+import re
+from typing import Iterable, Optional  # noqa: F401
+
+# Frame tokens in output paths: `%04d`, `####`, `$F4` and `<f4>`.
+_FRAME_TOKEN_REGEX = re.compile(r"%(?:0?(\d+))?d|(#+)|\$F(\d*)|<f(\d*)>")
+
+
+class PathTemplate:
+    """Output path with frame token parsed once.
+
+    Last frame token in the path is used. Use :func:`get_path_template`
+    to get cached instance.
+
+    Args:
+        path (str): Path with frame token like `%04d`, `####`, `$F4`
+            or `<f4>`.
+
+    """
+    __slots__ = ("path", "head", "tail", "padding")
+
+    def __init__(self, path):
+        # type: (str) -> None
+        self.path = path
+        match = None
+        for match in _FRAME_TOKEN_REGEX.finditer(path):
+            pass
+
+        if match is None:
+            self.head = path
+            self.tail = ""
+            self.padding = None
+            return
+
+        self.head = path[:match.start()]
+        self.tail = path[match.end():]
+        percent, hashes, houdini, angle = match.groups()
+        if hashes:
+            self.padding = len(hashes)
+        else:
+            self.padding = int(percent or houdini or angle or 0)
+
+    @property
+    def has_frame_token(self):
+        # type: () -> bool
+        return self.padding is not None
+
+    def format(self, frame):
+        # type: (int) -> str
+        """Path of single frame."""
+        if self.padding is None:
+            return self.path
+        return "{}{}{}".format(
+            self.head, str(frame).zfill(self.padding), self.tail)
+
+    def to_hashes(self):
+        # type: () -> str
+        """Path with frame token replaced by `#` padding."""
+        if self.padding is None:
+            return self.path
+        return "{}{}{}".format(
+            self.head, "#" * max(self.padding, 1), self.tail)
+
+    def parse_frame(self, path):
+        # type: (str) -> Optional[int]
+        """Get frame number from path matching the template.
+
+        Returns:
+            Optional[int]: Frame number or None if path does not match.
+
+        """
+        if self.padding is None:
+            return None
+        head_size = len(self.head)
+        tail_size = len(self.tail)
+        if (
+            len(path) <= head_size + tail_size
+            or not path.startswith(self.head)
+            or not path.endswith(self.tail)
+        ):
+            return None
+        frame = path[head_size:len(path) - tail_size]
+        if not frame.lstrip("-").isdigit():
+            return None
+        frame = int(frame)
+        if self.format(frame) != path:
+            return None
+        return frame
+
+    def __repr__(self):
+        return "<{} '{}'>".format(self.__class__.__name__, self.path)
+
+
+@functools.lru_cache(maxsize=256)
+def get_path_template(path):
+    # type: (str) -> PathTemplate
+    """Get cached :class:`PathTemplate` of the path."""
+    return PathTemplate(path)
+
+
+class FrameSequence:
+    """Files of image sequence described by path pattern and frame range.
+
+    Paths are created only when sequence is iterated, length and
+    membership checks are computed from the frame range.
+
+    Path without frame token describes single file (e.g. movie).
+
+    Args:
+        pattern (str): Output path with frame token supported by
+            :class:`PathTemplate`.
+        start (int): First frame.
+        end (int): Last frame (inclusive).
+        step (int): Frame step.
+        slate_offset (int): Amount of frames rendered before `start`,
+            e.g. `1` for slate frame.
+
+    """
+    def __init__(self, pattern, start, end, step=1, slate_offset=0):
+        # type: (str, int, int, int, int) -> None
+        template = get_path_template(pattern)
+        if template.has_frame_token:
+            template = get_path_template(pattern.replace("\\", "/"))
+        self._template = template
+
+        self.start = start
+        self.end = end
+        self.step = max(step, 1)
+        self.slate_offset = slate_offset
+
+    @property
+    def pattern(self):
+        # type: () -> str
+        return self._template.path
+
+    @property
+    def is_single_file(self):
+        # type: () -> bool
+        return not self._template.has_frame_token
+
+    @property
+    def frames(self):
+        # type: () -> Iterable[int]
+        """Frame numbers of the sequence including slate frames."""
+        return itertools.chain(
+            range(self.start - self.slate_offset, self.start),
+            range(self.start, self.end + 1, self.step),
+        )
+
+    def format(self, frame):
+        # type: (int) -> str
+        """Path of single frame."""
+        return self._template.format(frame)
+
+    def has_frame(self, frame):
+        # type: (int) -> bool
+        if self.start - self.slate_offset <= frame < self.start:
+            return True
+        return frame in range(self.start, self.end + 1, self.step)
+
+    def __iter__(self):
+        if self.is_single_file:
+            yield self.pattern
+            return
+        for frame in self.frames:
+            yield self._template.format(frame)
+
+    def __len__(self):
+        if self.is_single_file:
+            return 1
+        return (
+            self.slate_offset
+            + len(range(self.start, self.end + 1, self.step))
+        )
+
+    def __contains__(self, path):
+        if not isinstance(path, str):
+            return False
+        if self.is_single_file:
+            return path == self.pattern
+
+        frame = self._template.parse_frame(path.replace("\\", "/"))
+        return frame is not None and self.has_frame(frame)
+
+    def __repr__(self):
+        return "<{} '{}' {}-{}x{}>".format(
+            self.__class__.__name__,
+            self.pattern, self.start, self.end, self.step
+        )
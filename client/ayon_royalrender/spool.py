@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""Local spool of submissions which couldn't reach RoyalRender.
+
+Submission is written as XML file with metadata file next to it. The
+metadata file is written last, so only complete entries are flushed.
+Entries are flushed in order they were spooled, entry which fails to
+submit blocks later entries of the same root to keep their order.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Optional  # noqa: F401
+
+from ayon_core.lib import Logger, get_launcher_local_dir
+
+from .api import Api, path_exists
+from .rr_job import SubmitFile  # noqa: F401
+
+# Seconds after which lock of flush is considered abandoned
+LOCK_TIMEOUT = 600
+
+
+class SpoolLockedError(Exception):
+    """Spool is being flushed by other process."""
+    pass
+
+
+class SubmissionSpool:
+    """Directory with submissions waiting for RoyalRender root.
+
+    Args:
+        directory (Optional[str]): Spool directory, folder in AYON
+            launcher local directory is used by default.
+
+    """
+    def __init__(self, directory=None):
+        # type: (Optional[str]) -> None
+        if directory is None:
+            directory = get_launcher_local_dir("royalrender", "spool")
+        self._directory = directory
+        self.log = Logger.get_logger(self.__class__.__name__)
+
+    @property
+    def directory(self):
+        # type: () -> str
+        return self._directory
+
+    def add(self, submission, rr_root):
+        # type: (SubmitFile, str) -> str
+        """Add submission to spool.
+
+        Submission with the same content already waiting in spool is not
+        added again.
+
+        Args:
+            submission (SubmitFile): Submission to spool.
+            rr_root (str): RoyalRender root it is submitted to.
+
+        Returns:
+            str: Path to spooled submission file.
+
+        """
+        content = submission.serialize()
+        content_hash = hashlib.sha1(
+            "{}\n{}".format(rr_root, content).encode("utf-8")
+        ).hexdigest()[:16]
+        for entry in self.get_entries():
+            if entry["hash"] == content_hash:
+                self.log.debug(
+                    "Submission is already spooled: {}".format(
+                        entry["file"]))
+                return entry["file"]
+
+        os.makedirs(self._directory, exist_ok=True)
+        name = "{:020d}_{}".format(time.time_ns(), content_hash)
+        xml_path = os.path.join(self._directory, name + ".xml")
+        _write_atomic(xml_path, content)
+        _write_atomic(
+            os.path.join(self._directory, name + ".json"),
+            json.dumps({
+                "rr_root": rr_root,
+                "hash": content_hash,
+                "created": time.time(),
+            })
+        )
+        return xml_path
+
+    def get_entries(self):
+        # type: () -> list[dict]
+        """Spooled submissions in order they were added."""
+        try:
+            filenames = sorted(os.listdir(self._directory))
+        except OSError:
+            return []
+
+        entries = []
+        for filename in filenames:
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(self._directory, filename)
+            try:
+                with open(path, "r") as stream:
+                    entry = json.load(stream)
+            except (OSError, ValueError):
+                self.log.warning(
+                    "Skipping invalid spool entry: {}".format(path))
+                continue
+            entry["metadata"] = path
+            entry["file"] = path[:-len(".json")] + ".xml"
+            entries.append(entry)
+        return entries
+
+    def flush(self, batch_size=None, submit=None):
+        # type: (Optional[int], Optional[Callable]) -> list[dict]
+        """Submit spooled submissions of reachable roots.
+
+        Args:
+            batch_size (Optional[int]): Maximal number of submissions
+                submitted by this call.
+            submit (Optional[Callable[[str, str], None]]): Function
+                submitting file to root, `Api.submit_file` by default.
+
+        Returns:
+            list[dict]: Entries which were submitted.
+
+        Raises:
+            SpoolLockedError: When spool is flushed by other process.
+
+        """
+        if submit is None:
+            submit = _submit_file
+
+        submitted = []
+        blocked_roots = set()
+        with self._lock():
+            for entry in self.get_entries():
+                if batch_size is not None and len(submitted) >= batch_size:
+                    break
+                rr_root = entry["rr_root"]
+                if rr_root in blocked_roots:
+                    continue
+                if not path_exists(rr_root, ttl=0):
+                    self.log.info(
+                        "RoyalRender root is not reachable: {}".format(
+                            rr_root))
+                    blocked_roots.add(rr_root)
+                    continue
+                try:
+                    submit(entry["file"], rr_root)
+                except Exception:
+                    self.log.warning(
+                        "Submission of {} failed.".format(entry["file"]),
+                        exc_info=True
+                    )
+                    blocked_roots.add(rr_root)
+                    continue
+
+                os.remove(entry["metadata"])
+                os.remove(entry["file"])
+                submitted.append(entry)
+        return submitted
+
+    @property
+    def results_path(self):
+        # type: () -> str
+        """File with outcomes of submissions finished in background."""
+        return os.path.join(self._directory, "results.log")
+
+    def record_result(self, label, rr_root, error=None, spooled=None):
+        # type: (str, str, Optional[str], Optional[str]) -> None
+        """Append outcome of background submission as JSON line.
+
+        Background submission can finish after publish report is closed,
+        its outcome is kept here for the artist and for support.
+
+        Args:
+            label (str): Submitted file or description of submission.
+            rr_root (str): RoyalRender root it was submitted to.
+            error (Optional[str]): Error message if submission failed.
+            spooled (Optional[str]): Path to spooled submission file.
+
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        line = json.dumps({
+            "time": time.time(),
+            "submission": label,
+            "rr_root": rr_root,
+            "status": "failed" if error else "submitted",
+            "error": error,
+            "spooled": spooled,
+        })
+        with open(self.results_path, "a") as stream:
+            stream.write(line + "\n")
+
+    def _lock(self):
+        return _SpoolLock(os.path.join(self._directory, ".lock"))
+
+
+class _SpoolLock:
+    def __init__(self, path):
+        self._path = path
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        try:
+            if time.time() - os.path.getmtime(self._path) > LOCK_TIMEOUT:
+                os.remove(self._path)
+        except OSError:
+            pass
+        try:
+            fd = os.open(self._path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise SpoolLockedError(
+                "Spool is flushed by other process: {}".format(self._path))
+        os.write(fd, str(os.getpid()).encode("utf-8"))
+        os.close(fd)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            os.remove(self._path)
+        except OSError:
+            pass
+
+
+def _write_atomic(path, content):
+    # type: (str, str) -> None
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "w") as stream:
+        stream.write(content)
+    os.replace(tmp_path, path)
+
+
+def _submit_file(path, rr_root):
+    # type: (str, str) -> None
+    Api(rr_root).submit_file(path)
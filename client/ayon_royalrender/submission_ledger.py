@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Local ledger of submitted jobs used to suppress duplicate submissions.
+
+Each job is identified by hash of fields defining what it renders and
+where. Hash of a job covers hashes of jobs it depends on, so a job is
+a duplicate only when also all its upstream jobs are the same.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional  # noqa: F401
+
+from ayon_core.lib import get_launcher_local_dir
+
+from .rr_job import RRJob  # noqa: F401
+
+# Job fields defining output of the job. Volatile fields like PreIDs,
+# priority or environment are not part of the hash.
+JOB_HASH_FIELDS = (
+    "Software",
+    "Renderer",
+    "Version",
+    "SceneName",
+    "Camera",
+    "Layer",
+    "Channel",
+    "SeqStart",
+    "SeqEnd",
+    "SeqStep",
+    "SeqFileOffset",
+    "ImageDir",
+    "ImageFilename",
+    "ImageExtension",
+    "ImagePreNumberLetter",
+    "ImageSingleOutputFile",
+    "CustomAddCmdFlags",
+)
+
+LEDGER_FILENAME = "submission_ledger.json"
+
+
+def get_job_hashes(jobs):
+    # type: (list[RRJob]) -> dict[int, str]
+    """Get content hashes of jobs.
+
+    Args:
+        jobs (list[RRJob]): Jobs of the submission.
+
+    Returns:
+        dict[int, str]: Hash by `id` of the job.
+
+    """
+    hashes = {}
+
+    def _get_hash(job):
+        job_hash = hashes.get(id(job))
+        if job_hash is None:
+            data = {
+                field: getattr(job, field) for field in JOB_HASH_FIELDS
+            }
+            data["dependencies"] = sorted(
+                _get_hash(dependency) for dependency in job.dependencies
+            )
+            job_hash = hashlib.sha1(
+                json.dumps(data, sort_keys=True).encode("utf-8")
+            ).hexdigest()
+            hashes[id(job)] = job_hash
+        return job_hash
+
+    for job in jobs:
+        _get_hash(job)
+    return hashes
+
+
+def get_skippable_jobs(jobs, duplicates):
+    # type: (list[RRJob], list[RRJob]) -> list[RRJob]
+    """Filter duplicate jobs which can be left out of submission.
+
+    Duplicate job must be submitted anyway when some submitted job
+    depends on it, otherwise its `WaitForPreIDs` would not resolve.
+
+    Args:
+        jobs (list[RRJob]): Jobs of the submission.
+        duplicates (list[RRJob]): Jobs already submitted before.
+
+    Returns:
+        list[RRJob]: Jobs which can be skipped.
+
+    """
+    skipped = {id(job) for job in duplicates}
+    changed = True
+    while changed:
+        changed = False
+        for job in jobs:
+            if id(job) in skipped:
+                continue
+            for dependency in job.dependencies:
+                if id(dependency) in skipped:
+                    skipped.discard(id(dependency))
+                    changed = True
+    return [job for job in jobs if id(job) in skipped]
+
+
+class SubmissionLedger:
+    """Hashes of jobs submitted from this machine with time of submission.
+
+    Args:
+        window (float): Seconds for which submitted job is remembered.
+        path (Optional[str]): Path to ledger file, file in AYON launcher
+            local directory is used by default.
+
+    """
+    def __init__(self, window, path=None):
+        # type: (float, Optional[str]) -> None
+        if path is None:
+            path = os.path.join(
+                get_launcher_local_dir("royalrender"), LEDGER_FILENAME)
+        self._path = path
+        self._window = window
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        # type: () -> str
+        return self._path
+
+    def _load(self):
+        # type: () -> dict[str, float]
+        try:
+            with open(self._path, "r") as stream:
+                data = json.load(stream)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        oldest = time.time() - self._window
+        return {
+            job_hash: submitted
+            for job_hash, submitted in data.items()
+            if isinstance(submitted, (int, float)) and submitted >= oldest
+        }
+
+    def get_submitted(self, job_hashes):
+        # type: (list[str]) -> set[str]
+        """Get hashes submitted within the time window."""
+        submitted = self._load()
+        return {job_hash for job_hash in job_hashes if job_hash in submitted}
+
+    def record(self, job_hashes):
+        # type: (list[str]) -> None
+        """Record hashes as submitted now, expired entries are dropped."""
+        with self._lock:
+            data = self._load()
+            now = time.time()
+            for job_hash in job_hashes:
+                data[job_hash] = now
+
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = "{}.{}.tmp".format(self._path, os.getpid())
+            with open(tmp_path, "w") as stream:
+                json.dump(data, stream)
+            os.replace(tmp_path, self._path)
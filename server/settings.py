@@ -17,6 +17,162 @@ class ServerListSubmodel(BaseSettingsModel):
     )
 
 
+def root_selection_enum():
+    return [
+        {"value": "first_available", "label": "First available"},
+        {"value": "round_robin", "label": "Round robin"},
+        {"value": "least_loaded", "label": "Least loaded"},
+    ]
+
+
+def duplicate_action_enum():
+    return [
+        {"value": "skip", "label": "Skip"},
+        {"value": "warn", "label": "Warn"},
+    ]
+
+
+class CreateRenderJobModel(BaseSettingsModel):
+    chunk_size: int = SettingsField(
+        1,
+        ge=0,
+        title="Frames per task",
+        description=(
+            "Default amount of frames rendered by one task, 0 picks it"
+            " automatically from frame count."
+        ),
+    )
+    auto_chunk_clients: int = SettingsField(
+        10,
+        ge=1,
+        title="Auto chunk clients",
+        description=(
+            "Static estimate of clients frames are spread over when"
+            " frames per task are picked automatically. Available"
+            " clients of the farm are not queried."
+        ),
+    )
+    auto_chunk_min_size: int = SettingsField(
+        1,
+        ge=1,
+        title="Auto chunk minimum",
+        description="Minimal amount of frames in automatically sized task.",
+    )
+    auto_chunk_max_size: int = SettingsField(
+        100,
+        ge=0,
+        title="Auto chunk maximum",
+        description=(
+            "Maximal amount of frames in automatically sized task, 0"
+            " doesn't limit it."
+        ),
+    )
+    cores_per_client: int = SettingsField(
+        0,
+        ge=0,
+        title="Cores per client",
+        description=(
+            "CPU cores of render client split between concurrent render"
+            " instances, 0 doesn't limit threads of render application."
+        ),
+    )
+    use_gpu: bool = SettingsField(
+        False,
+        title="Use GPU",
+        description="Default of 'Use GPU' option of render jobs.",
+    )
+    gpu_count: int = SettingsField(
+        0,
+        ge=0,
+        title="Required GPUs",
+        description=(
+            "Minimal amount of GPUs of render client checked before"
+            " rendering jobs using GPU, 0 doesn't require any GPU."
+        ),
+    )
+    gpu_client_group: str = SettingsField(
+        "",
+        title="GPU client group",
+        description="Client group of jobs using GPU, empty keeps default.",
+    )
+    cpu_client_group: str = SettingsField(
+        "",
+        title="CPU client group",
+        description=(
+            "Client group of jobs not using GPU, empty keeps default."
+        ),
+    )
+    preresolve_farm_environment: bool = SettingsField(
+        False,
+        title="Resolve farm environment on submission",
+        description=(
+            "Environment is resolved in publishing session and shipped"
+            " with render jobs, render clients extract it only when it is"
+            " missing or stale."
+        ),
+    )
+
+
+class SubmitJobsToRoyalRenderModel(BaseSettingsModel):
+    compact_xml: bool = SettingsField(
+        False, title="Write compact submission file"
+    )
+    share_environment: bool = SettingsField(
+        True,
+        title="Share environment of jobs",
+        description="Move environment shared by jobs to one file.",
+    )
+    max_jobs_per_file: int = SettingsField(
+        0,
+        ge=0,
+        title="Max jobs per submission file",
+        description=(
+            "Jobs connected by dependencies stay in one file,"
+            " 0 disables splitting."
+        ),
+    )
+    max_parallel_submissions: int = SettingsField(
+        4, ge=1, title="Max parallel submissions"
+    )
+    async_submission: bool = SettingsField(
+        False,
+        title="Submit in background",
+        section="---",
+    )
+    submission_timeout: float = SettingsField(
+        60.0,
+        ge=0,
+        title="Submission timeout",
+        description=(
+            "Seconds publish waits for background submission, the rest of"
+            " submission finishes in background."
+        ),
+    )
+    spool_submissions: bool = SettingsField(
+        False,
+        title="Spool unreachable submissions",
+        description=(
+            "Submissions which can't reach Royal Render are submitted"
+            " later by 'royalrender flush-spool' command."
+        ),
+    )
+    duplicate_window: int = SettingsField(
+        0,
+        ge=0,
+        title="Duplicate detection window",
+        description=(
+            "Seconds for which submitted jobs are remembered to detect"
+            " duplicate submission, 0 disables the check."
+        ),
+        section="---",
+    )
+    duplicate_action: str = SettingsField(
+        "skip",
+        title="Duplicate action",
+        enum_resolver=duplicate_action_enum,
+    )
+
+
 class CollectSequencesFromJobModel(BaseSettingsModel):
     review: bool = SettingsField(
         True, title="Generate reviews from sequences"
@@ -28,6 +184,18 @@ class PublishPluginsModel(BaseSettingsModel):
         default_factory=CollectSequencesFromJobModel,
         title="Collect Sequences from the Job"
     )
+    CreateMayaRoyalRenderJob: CreateRenderJobModel = SettingsField(
+        default_factory=CreateRenderJobModel,
+        title="Create Maya Render job"
+    )
+    CreateNukeRoyalRenderJob: CreateRenderJobModel = SettingsField(
+        default_factory=CreateRenderJobModel,
+        title="Create Nuke Render job"
+    )
+    SubmitJobsToRoyalRender: SubmitJobsToRoyalRenderModel = SettingsField(
+        default_factory=SubmitJobsToRoyalRenderModel,
+        title="Submit jobs to Royal Render"
+    )
 
 
 class RoyalRenderSettings(BaseSettingsModel):
@@ -48,6 +216,15 @@ class RoyalRenderSettings(BaseSettingsModel):
         title="Selected Royal Render Paths",
         section="---",
     )
+    root_selection: str = SettingsField(
+        "first_available",
+        title="Root Selection",
+        enum_resolver=root_selection_enum,
+        description=(
+            "How one of selected Royal Render paths is chosen for"
+            " submission of each instance."
+        ),
+    )
     publish: PublishPluginsModel = SettingsField(
         default_factory=PublishPluginsModel,
         title="Publish plugins",
@@ -67,9 +244,45 @@ DEFAULT_VALUES = {
         }
     ],
     "selected_rr_paths": ["default"],
+    "root_selection": "first_available",
     "publish": {
         "CollectSequencesFromJob": {
             "review": True
+        },
+        "CreateMayaRoyalRenderJob": {
+            "chunk_size": 1,
+            "auto_chunk_clients": 10,
+            "auto_chunk_min_size": 1,
+            "auto_chunk_max_size": 100,
+            "cores_per_client": 0,
+            "use_gpu": False,
+            "gpu_count": 0,
+            "gpu_client_group": "",
+            "cpu_client_group": "",
+            "preresolve_farm_environment": False
+        },
+        "CreateNukeRoyalRenderJob": {
+            "chunk_size": 1,
+            "auto_chunk_clients": 10,
+            "auto_chunk_min_size": 1,
+            "auto_chunk_max_size": 100,
+            "cores_per_client": 0,
+            "use_gpu": False,
+            "gpu_count": 0,
+            "gpu_client_group": "",
+            "cpu_client_group": "",
+            "preresolve_farm_environment": False
+        },
+        "SubmitJobsToRoyalRender": {
+            "compact_xml": False,
+            "share_environment": True,
+            "max_jobs_per_file": 0,
+            "max_parallel_submissions": 4,
+            "async_submission": False,
+            "submission_timeout": 60.0,
+            "spool_submissions": False,
+            "duplicate_window": 0,
+            "duplicate_action": "skip"
         }
     }
 }
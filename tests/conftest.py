@@ -0,0 +1,210 @@
+import importlib
+import importlib.util
+import logging
+import os
+import sys
+import types
+
+import pytest
+
+CLIENT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "client",
+    "ayon_royalrender",
+)
+
+
+def load_module(name, *path_parts):
+    """Load module of the addon from file without importing the addon.
+
+    Addon package requires AYON launcher, modules which don't depend on
+    it can be tested on their own.
+    """
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(CLIENT_DIR, *path_parts))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _stub_pyblish():
+    """Minimal `pyblish.api` used by publish plugins of the addon.
+
+    Real `pyblish` is used when it is available.
+    """
+    try:
+        import pyblish.api  # noqa: F401
+        return
+    except ImportError:
+        pass
+
+    class Plugin:
+        log = logging.getLogger("pyblish")
+
+    class InstancePlugin(Plugin):
+        pass
+
+    class ContextPlugin(Plugin):
+        pass
+
+    pyblish = types.ModuleType("pyblish")
+    api = types.ModuleType("pyblish.api")
+    api.InstancePlugin = InstancePlugin
+    api.ContextPlugin = ContextPlugin
+    api.Context = object
+    api.Instance = object
+    api.CollectorOrder = 0
+    api.IntegratorOrder = 3
+    pyblish.api = api
+    sys.modules["pyblish"] = pyblish
+    sys.modules["pyblish.api"] = api
+
+
+def _stub_ayon_core():
+    """Minimal `ayon_core` used by addon modules without AYON launcher.
+
+    Real `ayon_core` is used when it is available.
+    """
+    try:
+        import ayon_core.lib  # noqa: F401
+        return
+    except ImportError:
+        pass
+
+    class Logger:
+        @staticmethod
+        def get_logger(name):
+            return logging.getLogger(name)
+
+    class AYONSettingsRegistry:
+        def __init__(self, name):
+            pass
+
+        def get_item(self, name):
+            raise ValueError(name)
+
+    def run_subprocess(*args, **kwargs):
+        raise RuntimeError("Subprocess is not available in tests")
+
+    def get_launcher_local_dir(*subdirs):
+        raise RuntimeError("Launcher directory is not available in tests")
+
+    class AttributeDefinition:
+        def __init__(self, key, default=None, **kwargs):
+            self.key = key
+            self.default = default
+
+    class KnownPublishError(Exception):
+        pass
+
+    ayon_core = types.ModuleType("ayon_core")
+    lib = types.ModuleType("ayon_core.lib")
+    vendor_bin_utils = types.ModuleType("ayon_core.lib.vendor_bin_utils")
+    lib.Logger = Logger
+    lib.AYONSettingsRegistry = AYONSettingsRegistry
+    lib.run_subprocess = run_subprocess
+    lib.get_launcher_local_dir = get_launcher_local_dir
+    lib.BoolDef = AttributeDefinition
+    lib.NumberDef = AttributeDefinition
+    lib.get_ayon_launcher_version = lambda: "1.0.0"
+    lib.is_in_tests = lambda: True
+    lib.get_oiio_tool_args = lambda tool_name, *args: [tool_name, *args]
+    vendor_bin_utils.find_tool_in_custom_paths = lambda paths, name: None
+    ayon_core.lib = lib
+    lib.vendor_bin_utils = vendor_bin_utils
+
+    pipeline = types.ModuleType("ayon_core.pipeline")
+    publish = types.ModuleType("ayon_core.pipeline.publish")
+    publish_lib = types.ModuleType("ayon_core.pipeline.publish.lib")
+    pipeline.AYONPyblishPluginMixin = type("AYONPyblishPluginMixin", (), {})
+    publish.KnownPublishError = KnownPublishError
+    publish_lib.get_published_workfile_instance = lambda context: None
+    ayon_core.pipeline = pipeline
+    pipeline.publish = publish
+    publish.lib = publish_lib
+
+    sys.modules["ayon_core"] = ayon_core
+    sys.modules["ayon_core.lib"] = lib
+    sys.modules["ayon_core.lib.vendor_bin_utils"] = vendor_bin_utils
+    sys.modules["ayon_core.pipeline"] = pipeline
+    sys.modules["ayon_core.pipeline.publish"] = publish
+    sys.modules["ayon_core.pipeline.publish.lib"] = publish_lib
+
+
+def load_package_module(name):
+    """Import module of the addon package without its `__init__`.
+
+    Package `__init__` imports the addon which requires AYON launcher,
+    modules importing only parts of `ayon_core` stubbed above can be
+    tested this way.
+    """
+    if "ayon_royalrender" not in sys.modules:
+        package = types.ModuleType("ayon_royalrender")
+        package.__path__ = [CLIENT_DIR]
+        sys.modules["ayon_royalrender"] = package
+    _stub_pyblish()
+    _stub_ayon_core()
+    return importlib.import_module("ayon_royalrender.{}".format(name))
+
+
+def load_plugin_module(name):
+    """Load publish plugin module of the addon."""
+    load_package_module("rr_job")
+    return load_module(
+        "ayon_royalrender_{}".format(name),
+        "plugins", "publish", "{}.py".format(name)
+    )
+
+
+def make_submission(rr_job, count):
+    """Submission with jobs using all kinds of job elements."""
+    jobs = []
+    for index in range(count):
+        job = rr_job.RRJob(
+            Software="Maya",
+            SceneOS="linux",
+            Renderer="arnold-maya",
+            Version="2025",
+            SceneName="/proj/shot{}/work/scene_v001.ma".format(index),
+            IsActive=True,
+            SeqStart=1001,
+            SeqEnd=1100,
+            SeqStep=1,
+            SeqFileOffset=0,
+            ImageDir="/proj/shot{}/render".format(index),
+            ImageFilename="beauty.",
+            ImageExtension=".exr",
+            ImagePreNumberLetter=".",
+            ImageWidth=1920,
+            ImageHeight=1080,
+            CustomSHotName="shot{} <main> & \"beauty\"".format(index),
+            SubmitterParameters=[
+                rr_job.SubmitterParameter("Priority", "1", "50"),
+                rr_job.SubmitterParameter("SendJobDisabled", "1", "0"),
+            ],
+            CustomAttributes=[
+                rr_job.CustomAttribute("UserInfo", "artist"),
+                rr_job.CustomAttribute("Department", "lighting"),
+            ],
+            WaitForPreIDs=list(range(index % 3)),
+            rrEnvList={
+                "AYON_PROJECT_NAME": "proj",
+                "AYON_FOLDER_PATH": "/shot{}".format(index),
+            },
+        )
+        job.rrEnvList.add_command("rrEnv_<JID>.allos")
+        jobs.append(job)
+
+    return rr_job.SubmitFile(
+        SubmitterParameters=[
+            rr_job.SubmitterParameter("RequiredMemory", "0"),
+            rr_job.SubmitterParameter("PPAyoninjectenvvar", "1~1"),
+        ],
+        Jobs=jobs,
+    )
+
+
+@pytest.fixture(scope="session")
+def rr_job():
+    # the same module addon modules import, so their job classes match
+    return load_package_module("rr_job")
@@ -0,0 +1,30 @@
+"""Paths and tools resolved on RoyalRender root."""
+import pytest
+
+from conftest import load_package_module
+
+
+@pytest.fixture
+def api():
+    api = load_package_module("api")
+    api.clear_path_cache()
+    yield api
+    api.clear_path_cache()
+
+
+def test_missing_root_is_checked_again(api, tmp_path):
+    rr_root = tmp_path / "rr"
+
+    assert not api.path_exists(str(rr_root))
+    rr_root.mkdir()
+    assert api.path_exists(str(rr_root))
+
+
+def test_existing_root_is_cached(api, tmp_path):
+    rr_root = tmp_path / "rr"
+    rr_root.mkdir()
+
+    assert api.path_exists(str(rr_root))
+    rr_root.rmdir()
+    assert api.path_exists(str(rr_root))
+    assert not api.path_exists(str(rr_root), ttl=0)
@@ -0,0 +1,60 @@
+"""Selection of RoyalRender root for publish instances."""
+import types
+
+import pytest
+
+from conftest import load_plugin_module
+
+
+@pytest.fixture(scope="module")
+def collector():
+    return load_plugin_module("collect_rr_path_from_instance")
+
+
+def make_instance(rr_roots, spool_submissions=False):
+    settings = {
+        "royalrender": {
+            "rr_paths": [
+                {"name": name, "value": {"linux": path, "windows": path,
+                                         "osx": path}}
+                for name, path in rr_roots.items()
+            ],
+            "selected_rr_paths": list(rr_roots),
+            "root_selection": "first_available",
+            "publish": {
+                "SubmitJobsToRoyalRender": {
+                    "spool_submissions": spool_submissions,
+                },
+            },
+        }
+    }
+    context = types.SimpleNamespace(data={"project_settings": settings})
+    return types.SimpleNamespace(data={}, context=context)
+
+
+def test_reachable_root(collector, tmp_path):
+    reachable = str(tmp_path)
+    instance = make_instance(
+        {"missing": str(tmp_path / "missing"), "main": reachable})
+
+    collector.CollectRRPathFromInstance().process(instance)
+
+    assert instance.data["rr_root"] == reachable
+    assert "rr_root_unreachable" not in instance.data
+
+
+def test_unreachable_root_fails_without_spooling(collector, tmp_path):
+    instance = make_instance({"main": str(tmp_path / "missing")})
+
+    with pytest.raises(collector.KnownPublishError, match="not reachable"):
+        collector.CollectRRPathFromInstance().process(instance)
+
+
+def test_unreachable_root_is_spooled(collector, tmp_path):
+    missing = str(tmp_path / "missing")
+    instance = make_instance({"main": missing}, spool_submissions=True)
+
+    collector.CollectRRPathFromInstance().process(instance)
+
+    assert instance.data["rr_root"] == missing
+    assert instance.data["rr_root_unreachable"] is True
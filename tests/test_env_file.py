@@ -0,0 +1,92 @@
+"""Environment files shared by jobs of one submission."""
+import os
+
+import pytest
+
+from conftest import load_package_module, make_submission
+
+
+@pytest.fixture(scope="module")
+def env_file():
+    return load_package_module("env_file")
+
+
+def read(path):
+    with open(path) as stream:
+        return stream.read()
+
+
+def test_write_env_file(env_file, tmp_path):
+    env = {"PATH_B": "/b", "NAME": "it's"}
+
+    path = env_file.write_env_file(str(tmp_path), env)
+
+    base_path = path[:-len(".allos")]
+    assert path.endswith(".allos")
+    assert os.path.basename(base_path).startswith("rrEnv_")
+    assert read(base_path + ".bat") == 'set "NAME=it\'s"\nset "PATH_B=/b"\n'
+    assert read(base_path + ".sh") == (
+        "export NAME='it'\"'\"'s'\nexport PATH_B=/b\n"
+    )
+    # same content is written once
+    assert env_file.write_env_file(str(tmp_path), dict(env)) == path
+    assert len(os.listdir(str(tmp_path))) == 2
+    assert env_file.write_env_file(str(tmp_path), {"NAME": "other"}) != path
+
+
+def test_share_job_environments(env_file, rr_job, tmp_path):
+    jobs = make_submission(rr_job, 3).Jobs
+    for job in jobs:
+        job.rrEnvList.update({"OCIO": "/config.ocio", "AYON_APP_NAME": "a"})
+    jobs[0].rrEnvList["ONLY_FIRST"] = "1"
+
+    over_limit = env_file.share_job_environments(jobs, str(tmp_path))
+
+    assert over_limit == []
+    shared_path = jobs[0].rrEnvFile
+    assert all(job.rrEnvFile == shared_path for job in jobs)
+    assert read(shared_path[:-len(".allos")] + ".sh") == (
+        "export OCIO=/config.ocio\n")
+    # variables read by render client stay on the job
+    assert dict(jobs[1].rrEnvList) == {
+        "AYON_PROJECT_NAME": "proj",
+        "AYON_FOLDER_PATH": "/shot1",
+        "AYON_APP_NAME": "a",
+    }
+    assert jobs[0].rrEnvList["ONLY_FIRST"] == "1"
+    assert jobs[1].rrEnvList.commands == ["rrEnv_<JID>.allos"]
+
+
+def test_job_over_limit_spills_to_own_file(env_file, rr_job, tmp_path):
+    jobs = make_submission(rr_job, 2).Jobs
+    jobs[1].rrEnvList["LONG"] = "x" * 100
+
+    over_limit = env_file.share_job_environments(
+        jobs, str(tmp_path), limit=100)
+
+    assert over_limit == []
+    assert jobs[0].rrEnvFile is None
+    assert "LONG" not in jobs[1].rrEnvList
+    assert os.path.basename(jobs[1].rrEnvFile).startswith("rrEnv_job_")
+    assert "LONG" in read(jobs[1].rrEnvFile[:-len(".allos")] + ".sh")
+
+
+def test_inline_variables_over_limit(env_file, rr_job, tmp_path):
+    jobs = make_submission(rr_job, 1).Jobs
+    jobs[0].rrEnvList["AYON_TASK_NAME"] = "x" * 100
+
+    over_limit = env_file.share_job_environments(
+        jobs, str(tmp_path), limit=100)
+
+    assert over_limit == jobs
+
+
+def test_job_with_env_file_is_not_changed(env_file, rr_job, tmp_path):
+    jobs = make_submission(rr_job, 2).Jobs
+    jobs[0].rrEnvFile = "/custom/rrEnv.allos"
+    env = dict(jobs[0].rrEnvList)
+
+    env_file.share_job_environments(jobs, str(tmp_path))
+
+    assert jobs[0].rrEnvFile == "/custom/rrEnv.allos"
+    assert dict(jobs[0].rrEnvList) == env
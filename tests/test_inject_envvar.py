@@ -0,0 +1,122 @@
+import json
+import sys
+import types
+
+import pytest
+
+from conftest import load_module
+
+API_KEY = "secret-api-key-1234"
+
+
+@pytest.fixture
+def inject_envvar(monkeypatch, tmp_path):
+    # RR SDK modules are available only on render workers
+    package = types.ModuleType("rr_python_utils")
+    connection = types.ModuleType("rr_python_utils.connection")
+    package.connection = connection
+    monkeypatch.setitem(sys.modules, "rr_python_utils", package)
+    monkeypatch.setitem(sys.modules, "rr_python_utils.connection", connection)
+    monkeypatch.setitem(sys.modules, "rrJob", types.ModuleType("rrJob"))
+    monkeypatch.setenv("RR_ROOT", str(tmp_path))
+    monkeypatch.setenv("AYON_SERVER_URL", "http://ayon.local")
+    monkeypatch.setenv("AYON_API_KEY", API_KEY)
+    monkeypatch.setenv("SHOTGRID_TOKEN", "secret-token-5678")
+    return load_module(
+        "ayon_inject_envvar",
+        "rr_root", "render_apps", "scripts", "ayon_inject_envvar.py",
+    )
+
+
+def get_records(capsys):
+    return [
+        json.loads(line)
+        for line in capsys.readouterr().out.splitlines()
+        if line.startswith("{")
+    ]
+
+
+def test_launch_environments_are_logged_without_secrets(
+    inject_envvar, capsys
+):
+    injector = inject_envvar.InjectEnvironment.__new__(
+        inject_envvar.InjectEnvironment)
+    injector._job_envs = {"AYON_BUNDLE_NAME": "Production"}
+
+    environment = injector._get_launch_environments()
+
+    assert environment["AYON_API_KEY"] == API_KEY
+    records = get_records(capsys)
+    assert records
+    for record in records:
+        assert API_KEY not in json.dumps(record)
+    assert inject_envvar.logs
+    for message in inject_envvar.logs:
+        assert API_KEY not in message
+
+
+def test_log_event_redacts_secrets(inject_envvar, capsys):
+    inject_envvar.log_event(
+        "test",
+        env={
+            "AYON_API_KEY": API_KEY,
+            "DB_PASSWORD": "hunter22",
+            "AYON_BUNDLE_NAME": "Production",
+        },
+        args=["--key", API_KEY],
+    )
+    inject_envvar.log("error::b'invalid key {}'".format(API_KEY))
+    inject_envvar.log("output:: token secret-token-5678")
+
+    output = capsys.readouterr().out
+    assert API_KEY not in output
+    assert "hunter22" not in output
+    assert "secret-token-5678" not in output
+
+    record = json.loads(output.splitlines()[0])
+    assert record["env"]["AYON_API_KEY"] == inject_envvar.REDACTED
+    assert record["env"]["DB_PASSWORD"] == inject_envvar.REDACTED
+    assert record["env"]["AYON_BUNDLE_NAME"] == "Production"
+
+
+def make_injector(inject_envvar, job_envs):
+    injector = inject_envvar.InjectEnvironment.__new__(
+        inject_envvar.InjectEnvironment)
+    injector._job_envs = job_envs
+    injector.timings = {}
+    return injector
+
+
+def test_client_without_required_gpus_is_rejected(
+    inject_envvar, monkeypatch
+):
+    injector = make_injector(inject_envvar, {"AYON_RR_MIN_GPUS": "2"})
+
+    monkeypatch.setenv("GPUsInstalledList", "0,1")
+    injector._check_gpus()
+
+    monkeypatch.setenv("GPUsInstalledList", "0")
+    with pytest.raises(inject_envvar.ClientRequirementError):
+        injector._check_gpus()
+
+    # GPUs can't be checked without RoyalRender variable
+    monkeypatch.delenv("GPUsInstalledList")
+    injector._check_gpus()
+
+
+def test_gpus_are_not_checked_without_requirement(
+    inject_envvar, monkeypatch
+):
+    monkeypatch.setenv("GPUsInstalledList", "")
+
+    make_injector(inject_envvar, {})._check_gpus()
+    make_injector(inject_envvar, {"AYON_RR_MIN_GPUS": "0"})._check_gpus()
+
+
+def test_env_cache_lock_without_writable_folder(inject_envvar, tmp_path):
+    # file in place of cache folder can't be created as folder
+    blocker = tmp_path / "cache"
+    blocker.write_text("")
+
+    with inject_envvar._EnvCacheLock(str(blocker / "key.json.lock")) as lock:
+        assert not lock._locked
@@ -0,0 +1,144 @@
+"""Scheduling of dependent jobs submitted together."""
+import pytest
+
+from conftest import load_package_module, make_submission
+
+
+@pytest.fixture(scope="module")
+def job_graph():
+    return load_package_module("job_graph")
+
+
+def make_jobs(rr_job, count):
+    jobs = make_submission(rr_job, count).Jobs
+    for index, job in enumerate(jobs):
+        job.CustomSHotName = "job{}".format(index)
+        job.WaitForPreIDs = []
+    return jobs
+
+
+def labels(jobs):
+    return [job.CustomSHotName for job in jobs]
+
+
+def test_levels(job_graph, rr_job):
+    render_a, render_b, publish, review = make_jobs(rr_job, 4)
+    publish.add_dependencies(render_a, render_b)
+    review.add_dependencies(publish)
+
+    levels = job_graph.JobGraph(
+        [review, publish, render_a, render_b]).get_levels()
+
+    assert [labels(level) for level in levels] == [
+        ["job0", "job1"], ["job2"], ["job3"]
+    ]
+
+
+def test_cycle_fails(job_graph, rr_job):
+    first, second = make_jobs(rr_job, 2)
+    first.add_dependencies(second)
+    second.add_dependencies(first)
+
+    with pytest.raises(job_graph.JobGraphError, match="cyclic"):
+        job_graph.JobGraph([first, second]).get_levels()
+
+
+def test_dependency_outside_of_submission_fails(job_graph, rr_job):
+    first, second = make_jobs(rr_job, 2)
+    second.add_dependencies(first)
+
+    with pytest.raises(job_graph.JobGraphError, match="not part"):
+        job_graph.JobGraph([second])
+
+
+def test_components(job_graph, rr_job):
+    jobs = make_jobs(rr_job, 5)
+    jobs[1].add_dependencies(jobs[0])
+    jobs[4].add_dependencies(jobs[2])
+
+    components = job_graph.JobGraph(jobs).get_components()
+
+    assert [labels(component) for component in components] == [
+        ["job0", "job1"], ["job2", "job4"], ["job3"]
+    ]
+
+
+def test_split_keeps_connected_jobs_together(job_graph, rr_job):
+    jobs = make_jobs(rr_job, 6)
+    jobs[1].add_dependencies(jobs[0])
+    jobs[2].add_dependencies(jobs[1])
+    jobs[4].add_dependencies(jobs[3])
+
+    batches = job_graph.JobGraph(jobs).split(3)
+
+    assert [labels(batch) for batch in batches] == [
+        ["job0", "job1", "job2"], ["job3", "job4", "job5"]
+    ]
+
+    # group bigger than the limit is a batch on its own
+    batches = job_graph.JobGraph(jobs).split(2)
+
+    assert [labels(batch) for batch in batches] == [
+        ["job0", "job1", "job2"], ["job3", "job4"], ["job5"]
+    ]
+
+
+def test_split_is_limited_by_pre_ids(job_graph, rr_job):
+    jobs = make_jobs(rr_job, job_graph.MAX_PRE_ID + 2)
+
+    batches = job_graph.JobGraph(jobs).split(1000)
+
+    assert [len(batch) for batch in batches] == [job_graph.MAX_PRE_ID + 1, 1]
+
+
+def test_assign_pre_ids(job_graph, rr_job):
+    render_a, render_b, publish = make_jobs(rr_job, 3)
+    publish.add_dependencies(render_a, render_b)
+
+    ordered = job_graph.JobGraph(
+        [publish, render_a, render_b]).assign_pre_ids()
+
+    assert labels(ordered) == ["job0", "job1", "job2"]
+    assert [job.PreID for job in ordered] == [0, 1, 2]
+    assert render_a.WaitForPreIDs == []
+    assert publish.WaitForPreIDs == [0, 1]
+
+
+def test_assign_pre_ids_limit(job_graph, rr_job):
+    graph = job_graph.JobGraph(make_jobs(rr_job, job_graph.MAX_PRE_ID + 1))
+    assert len(graph.assign_pre_ids()) == job_graph.MAX_PRE_ID + 1
+
+    graph = job_graph.JobGraph(make_jobs(rr_job, job_graph.MAX_PRE_ID + 2))
+    with pytest.raises(job_graph.JobGraphError, match="only 256"):
+        graph.assign_pre_ids()
+
+
+def test_batches_of_one_round_do_not_share_pre_ids(job_graph, rr_job):
+    jobs = make_jobs(rr_job, 4)
+    jobs[1].add_dependencies(jobs[0])
+    jobs[3].add_dependencies(jobs[2])
+    batches = job_graph.JobGraph(jobs).split(2)
+
+    rounds = job_graph.assign_batch_pre_ids(batches)
+
+    assert len(rounds) == 1
+    assert [[job.PreID for job in batch] for batch in rounds[0]] == [
+        [0, 1], [2, 3]
+    ]
+    assert jobs[1].WaitForPreIDs == [0]
+    assert jobs[3].WaitForPreIDs == [2]
+
+
+def test_batches_over_pre_id_limit_start_next_round(job_graph, rr_job):
+    jobs = make_jobs(rr_job, job_graph.MAX_PRE_ID + 11)
+    batches = job_graph.JobGraph(jobs).split(100)
+
+    rounds = job_graph.assign_batch_pre_ids(batches)
+
+    assert [[len(batch) for batch in batches] for batches in rounds] == [
+        [100, 100], [66]
+    ]
+    for batches in rounds:
+        pre_ids = [job.PreID for batch in batches for job in batch]
+        assert len(pre_ids) == len(set(pre_ids))
+    assert rounds[1][0][0].PreID == 0
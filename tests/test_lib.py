@@ -0,0 +1,61 @@
+"""Render jobs created by `BaseCreateRoyalRenderJob`."""
+import types
+
+import pytest
+
+from conftest import load_package_module
+
+
+@pytest.fixture(scope="module")
+def lib():
+    return load_package_module("lib")
+
+
+def make_instance(**attribute_values):
+    return types.SimpleNamespace(data={"attributeValues": attribute_values})
+
+
+def test_gpu_is_not_used_by_default(lib):
+    plugin = lib.BaseCreateRoyalRenderJob()
+    plugin.gpu_client_group = "gpu"
+    plugin.cpu_client_group = "cpu"
+    instance = make_instance()
+
+    assert plugin.get_gpu_environment(instance) == {}
+    assert [
+        parameter.serialize()
+        for parameter in plugin.get_gpu_parameters(instance)
+    ] == ["DefaultClientGroup=1~cpu"]
+
+
+def test_gpu_requirement(lib):
+    plugin = lib.BaseCreateRoyalRenderJob()
+    plugin.gpu_client_group = "gpu"
+    instance = make_instance(use_gpu=True, gpu_count=2)
+
+    assert plugin.get_gpu_environment(instance) == {"AYON_RR_MIN_GPUS": "2"}
+    assert [
+        parameter.serialize()
+        for parameter in plugin.get_gpu_parameters(instance)
+    ] == ["DefaultClientGroup=1~gpu"]
+    assert plugin.get_concurrency_parameters(instance) == []
+
+
+def test_render_instance_per_gpu(lib):
+    plugin = lib.BaseCreateRoyalRenderJob()
+    instance = make_instance(
+        use_gpu=True, gpu_count=4, split_gpus=True, concurrency=1)
+
+    assert plugin.get_gpu_environment(instance) == {
+        "AYON_RR_MIN_GPUS": "4",
+        "CUDA_VISIBLE_DEVICES": "<GpuListC>",
+    }
+    assert [
+        parameter.serialize()
+        for parameter in plugin.get_concurrency_parameters(instance)
+    ] == ["StartMultipleInstances=1~4"]
+
+    # split is ignored without GPUs
+    instance = make_instance(use_gpu=False, gpu_count=4, split_gpus=True)
+    assert plugin.get_gpu_environment(instance) == {}
+    assert plugin.get_concurrency_parameters(instance) == []
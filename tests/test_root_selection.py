@@ -0,0 +1,93 @@
+"""Selection of RoyalRender root from roots selected for project."""
+import pytest
+
+from conftest import load_package_module
+
+
+@pytest.fixture
+def root_selection():
+    root_selection = load_package_module("root_selection")
+    root_selection._load_cache.clear()
+    root_selection._round_robin_counters.clear()
+    return root_selection
+
+
+@pytest.fixture
+def roots(tmp_path):
+    roots = []
+    for name in ("rr_a", "rr_b", "rr_c"):
+        (tmp_path / name).mkdir()
+        roots.append(str(tmp_path / name))
+    return roots
+
+
+class Probe:
+    def __init__(self, loads):
+        self.loads = loads
+        self.queried = []
+
+    def get_load(self, rr_root):
+        self.queried.append(rr_root)
+        load = self.loads.get(rr_root)
+        if isinstance(load, Exception):
+            raise load
+        return load
+
+
+def test_first_available(root_selection, roots, tmp_path):
+    missing = str(tmp_path / "missing")
+
+    assert root_selection.select_root([missing] + roots) == roots[0]
+    assert root_selection.select_root([missing]) is None
+
+
+def test_round_robin(root_selection, roots):
+    selected = [
+        root_selection.select_root(roots, root_selection.ROUND_ROBIN)
+        for _ in range(4)
+    ]
+
+    assert selected == roots + roots[:1]
+
+
+def test_least_loaded(root_selection, roots):
+    RootLoad = root_selection.RootLoad
+    probe = Probe({
+        roots[0]: RootLoad(queued_jobs=100, free_clients=4),
+        roots[1]: RootLoad(queued_jobs=10, free_clients=0),
+        roots[2]: RootLoad(queued_jobs=50, free_clients=9),
+    })
+
+    selected = root_selection.select_root(
+        roots, root_selection.LEAST_LOADED, probe)
+
+    assert selected == roots[2]
+    # load is cached for a short time
+    root_selection.select_root(roots, root_selection.LEAST_LOADED, probe)
+    assert sorted(probe.queried) == sorted(roots)
+
+
+def test_least_loaded_skips_roots_without_load(root_selection, roots):
+    RootLoad = root_selection.RootLoad
+    probe = Probe({
+        roots[0]: RuntimeError("Server is not responding"),
+        roots[2]: RootLoad(queued_jobs=5, free_clients=1),
+    })
+
+    selected = root_selection.select_root(
+        roots, root_selection.LEAST_LOADED, probe)
+
+    assert selected == roots[2]
+
+
+def test_least_loaded_falls_back_to_first_available(root_selection, roots):
+    strategy = root_selection.LEAST_LOADED
+
+    assert root_selection.select_root(roots, strategy) == roots[0]
+    probe = Probe({roots[0]: RuntimeError("Server is not responding")})
+    assert root_selection.select_root(roots, strategy, probe) == roots[0]
+
+
+def test_unknown_strategy(root_selection, roots):
+    with pytest.raises(ValueError, match="Unknown"):
+        root_selection.select_root(roots, "fastest")
@@ -0,0 +1,61 @@
+import io
+
+from conftest import make_submission
+
+
+def parse(rr_job, xml):
+    return rr_job.SubmitFile.parse(io.StringIO(xml))
+
+
+def test_parse_round_trip(rr_job):
+    submit_file = make_submission(rr_job, 5)
+    xml = submit_file.serialize()
+
+    parsed = parse(rr_job, xml)
+
+    assert parsed.serialize() == xml
+    assert parsed.serialize(compact=True) == submit_file.serialize(
+        compact=True)
+
+
+def test_parse_job_values(rr_job):
+    submit_file = make_submission(rr_job, 3)
+
+    parsed = parse(rr_job, submit_file.serialize())
+
+    assert parsed.SubmitterParameters == submit_file.SubmitterParameters
+    assert len(parsed.Jobs) == 3
+    job = parsed.Jobs[2]
+    assert job.SeqStart == 1001
+    assert job.IsActive is True
+    assert job.CustomSHotName == "shot2 <main> & \"beauty\""
+    assert job.WaitForPreIDs == [0, 1]
+    assert job.rrEnvList == {
+        "AYON_PROJECT_NAME": "proj",
+        "AYON_FOLDER_PATH": "/shot2",
+    }
+    assert job.rrEnvList.commands == ["rrEnv_<JID>.allos"]
+
+
+def test_parse_custom_attribute_named_as_job_attribute(rr_job):
+    submit_file = make_submission(rr_job, 1)
+
+    job = parse(rr_job, submit_file.serialize()).Jobs[0]
+
+    # written after job attributes, so it stays custom attribute
+    assert job.CustomUserInfo is None
+    assert job.CustomAttributes == [
+        rr_job.CustomAttribute("UserInfo", "artist"),
+        rr_job.CustomAttribute("Department", "lighting"),
+    ]
+
+
+def test_parse_custom_job_attribute(rr_job):
+    submit_file = make_submission(rr_job, 1)
+    submit_file.Jobs[0].CustomAttributes = []
+    submit_file.Jobs[0].CustomUserInfo = "artist"
+
+    job = parse(rr_job, submit_file.serialize()).Jobs[0]
+
+    assert job.CustomUserInfo == "artist"
+    assert job.CustomAttributes == []
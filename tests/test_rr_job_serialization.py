@@ -0,0 +1,93 @@
+"""Streaming serialization of submission compared to `xml.dom.minidom`.
+
+Run as script to print timings of both serializations:
+    python tests/test_rr_job_serialization.py [amount of jobs]
+"""
+import sys
+import time
+import timeit
+from collections import OrderedDict
+from xml.dom import minidom
+
+import attr
+
+from conftest import load_module, make_submission
+
+
+def serialize_with_minidom(rr_job, submit_file):
+    """Serialization used before streaming writer, kept as reference."""
+    def filter_data(a, v):
+        if a.name.startswith("_"):
+            return False
+        if v is None:
+            return False
+        return True
+
+    def add_parameters(parameters, dom, append_to):
+        for param in parameters:
+            element = dom.createElement("SubmitterParameter")
+            element.appendChild(dom.createTextNode(param.serialize()))
+            append_to.appendChild(element)
+
+    root = minidom.Document()
+    job_file = root.createElement("RR_Job_File")
+    job_file.setAttribute("syntax_version", submit_file.syntax_version)
+    add_parameters(submit_file.SubmitterParameters, root, job_file)
+    root.appendChild(job_file)
+    for job in submit_file.Jobs:
+        xml_job = root.createElement("Job")
+        add_parameters(job.SubmitterParameters, root, xml_job)
+
+        serialized_job = attr.asdict(
+            job, dict_factory=OrderedDict, filter=filter_data,
+            recurse=False)
+        serialized_job.pop("CustomAttributes")
+        serialized_job.pop("SubmitterParameters")
+        wait_pre_ids = serialized_job.pop("WaitForPreIDs", [])
+        for custom_attr in job.CustomAttributes:
+            serialized_job["Custom{}".format(
+                custom_attr.name)] = custom_attr.value
+
+        for item, value in serialized_job.items():
+            if isinstance(value, rr_job.RREnvList):
+                value = value.serialize()
+            element = root.createElement(item)
+            element.appendChild(root.createTextNode(str(value)))
+            xml_job.appendChild(element)
+
+        for pre_id in wait_pre_ids:
+            element = root.createElement("WaitForPreID")
+            element.appendChild(root.createTextNode(str(pre_id)))
+            xml_job.appendChild(element)
+
+        job_file.appendChild(xml_job)
+
+    return root.toprettyxml(indent="\t")
+
+
+def benchmark(rr_job, count=1000, repeat=3):
+    """Best time of minidom and streaming serialization in seconds."""
+    submit_file = make_submission(rr_job, count)
+    timer = time.perf_counter
+    minidom_time = min(timeit.repeat(
+        lambda: serialize_with_minidom(rr_job, submit_file),
+        number=1, repeat=repeat, timer=timer
+    ))
+    streaming_time = min(timeit.repeat(
+        submit_file.serialize, number=1, repeat=repeat, timer=timer
+    ))
+    return minidom_time, streaming_time
+
+
+def test_streaming_matches_minidom(rr_job):
+    submit_file = make_submission(rr_job, 50)
+
+    assert submit_file.serialize() == serialize_with_minidom(
+        rr_job, submit_file)
+
+
+if __name__ == "__main__":
+    job_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    results = benchmark(load_module("rr_job", "rr_job.py"), job_count)
+    print("{} jobs: minidom {:.1f} ms, streaming {:.1f} ms".format(
+        job_count, *(value * 1000 for value in results)))
@@ -0,0 +1,107 @@
+"""Expected files described by path pattern and frame range."""
+import pytest
+
+from conftest import load_package_module
+
+
+@pytest.fixture(scope="module")
+def sequence():
+    return load_package_module("sequence")
+
+
+def test_frames_with_step_and_slate(sequence):
+    frames = sequence.FrameSequence(
+        "/render/beauty.####.exr", 1001, 1010, step=3, slate_offset=1)
+
+    assert list(frames.frames) == [1000, 1001, 1004, 1007, 1010]
+    assert len(frames) == 5
+    assert list(frames) == [
+        "/render/beauty.1000.exr",
+        "/render/beauty.1001.exr",
+        "/render/beauty.1004.exr",
+        "/render/beauty.1007.exr",
+        "/render/beauty.1010.exr",
+    ]
+
+
+def test_contains(sequence):
+    frames = sequence.FrameSequence(
+        "/render/beauty.####.exr", 1001, 1010, step=3, slate_offset=1)
+
+    assert "/render/beauty.1000.exr" in frames
+    assert "/render/beauty.1004.exr" in frames
+    # frame skipped by step
+    assert "/render/beauty.1002.exr" not in frames
+    assert "/render/beauty.1013.exr" not in frames
+    # wrong padding
+    assert "/render/beauty.01004.exr" not in frames
+    assert "/render/other.1004.exr" not in frames
+    assert 1004 not in frames
+
+
+def test_windows_paths(sequence):
+    frames = sequence.FrameSequence("C:\\render\\beauty.####.exr", 1, 2)
+
+    assert list(frames) == [
+        "C:/render/beauty.0001.exr", "C:/render/beauty.0002.exr"
+    ]
+    assert "C:\\render\\beauty.0002.exr" in frames
+
+
+def test_single_file(sequence):
+    movie = sequence.FrameSequence("/render/review.mov", 1001, 1100)
+
+    assert movie.is_single_file
+    assert len(movie) == 1
+    assert list(movie) == ["/render/review.mov"]
+    assert "/render/review.mov" in movie
+
+
+@pytest.mark.parametrize("path,padding", [
+    ("/render/beauty.%04d.exr", 4),
+    ("/render/beauty.%d.exr", 0),
+    ("/render/beauty.###.exr", 3),
+    ("/render/beauty.$F4.exr", 4),
+    ("/render/beauty.<f5>.exr", 5),
+])
+def test_path_template_tokens(sequence, path, padding):
+    template = sequence.PathTemplate(path)
+
+    assert template.padding == padding
+    assert template.format(12) == "/render/beauty.{}.exr".format(
+        str(12).zfill(padding))
+    assert template.to_hashes() == "/render/beauty.{}.exr".format(
+        "#" * max(padding, 1))
+
+
+def test_path_template_uses_last_token(sequence):
+    template = sequence.PathTemplate("/render/v####/beauty.%04d.exr")
+
+    assert template.format(7) == "/render/v####/beauty.0007.exr"
+
+
+def test_path_template_parse_frame(sequence):
+    template = sequence.PathTemplate("/render/beauty.####.exr")
+
+    assert template.parse_frame("/render/beauty.1001.exr") == 1001
+    assert template.parse_frame("/render/beauty.-001.exr") == -1
+    assert template.parse_frame("/render/beauty.12345.exr") == 12345
+    assert template.parse_frame("/render/beauty.001.exr") is None
+    assert template.parse_frame("/render/beauty.abcd.exr") is None
+    assert template.parse_frame("/render/other.1001.exr") is None
+
+
+def test_path_template_without_token(sequence):
+    template = sequence.PathTemplate("/render/review.mov")
+
+    assert not template.has_frame_token
+    assert template.format(1001) == "/render/review.mov"
+    assert template.to_hashes() == "/render/review.mov"
+    assert template.parse_frame("/render/review.mov") is None
+
+
+def test_path_template_is_cached(sequence):
+    path = "/render/beauty.####.exr"
+
+    assert sequence.get_path_template(path) is sequence.get_path_template(
+        path)
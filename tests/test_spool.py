@@ -0,0 +1,115 @@
+"""Spooled submissions waiting for unreachable RoyalRender root."""
+import os
+
+import pytest
+
+from conftest import load_package_module, make_submission
+
+
+@pytest.fixture(scope="module")
+def spool():
+    return load_package_module("spool")
+
+
+@pytest.fixture
+def roots(tmp_path):
+    reachable = tmp_path / "rr_reachable"
+    reachable.mkdir()
+    return str(reachable), str(tmp_path / "rr_unreachable")
+
+
+class Submitter:
+    """Records submitted files, fails submissions of `failing` roots."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.submitted = []
+
+    def __call__(self, path, rr_root):
+        if rr_root in self.failing:
+            raise RuntimeError("Submission failed")
+        with open(path) as stream:
+            self.submitted.append((stream.read(), rr_root))
+
+
+def test_add_skips_same_submission(spool, rr_job, tmp_path, roots):
+    submission_spool = spool.SubmissionSpool(str(tmp_path / "spool"))
+    submission = make_submission(rr_job, 2)
+
+    path = submission_spool.add(submission, roots[0])
+
+    assert submission_spool.add(make_submission(rr_job, 2), roots[0]) == path
+    assert submission_spool.add(submission, roots[1]) != path
+    entries = submission_spool.get_entries()
+    assert len(entries) == 2
+    assert entries[0]["file"] == path
+
+
+def test_flush_submits_reachable_roots_in_order(
+    spool, rr_job, tmp_path, roots
+):
+    reachable, unreachable = roots
+    submission_spool = spool.SubmissionSpool(str(tmp_path / "spool"))
+    first = make_submission(rr_job, 1)
+    second = make_submission(rr_job, 2)
+    submission_spool.add(first, reachable)
+    waiting = submission_spool.add(first, unreachable)
+    submission_spool.add(second, reachable)
+    submitter = Submitter()
+
+    submitted = submission_spool.flush(submit=submitter)
+
+    assert [entry["rr_root"] for entry in submitted] == [reachable] * 2
+    assert submitter.submitted == [
+        (first.serialize(), reachable),
+        (second.serialize(), reachable),
+    ]
+    assert [
+        entry["file"] for entry in submission_spool.get_entries()
+    ] == [waiting]
+
+
+def test_failed_submission_blocks_its_root(spool, rr_job, tmp_path, roots):
+    reachable = roots[0]
+    submission_spool = spool.SubmissionSpool(str(tmp_path / "spool"))
+    submission_spool.add(make_submission(rr_job, 1), reachable)
+    submission_spool.add(make_submission(rr_job, 2), reachable)
+
+    submitted = submission_spool.flush(submit=Submitter([reachable]))
+
+    assert submitted == []
+    assert len(submission_spool.get_entries()) == 2
+
+
+def test_flush_batch_size(spool, rr_job, tmp_path, roots):
+    submission_spool = spool.SubmissionSpool(str(tmp_path / "spool"))
+    submission_spool.add(make_submission(rr_job, 1), roots[0])
+    submission_spool.add(make_submission(rr_job, 2), roots[0])
+
+    submitted = submission_spool.flush(batch_size=1, submit=Submitter())
+
+    assert len(submitted) == 1
+    assert len(submission_spool.get_entries()) == 1
+
+
+def test_flush_of_locked_spool_fails(spool, rr_job, tmp_path, roots):
+    directory = tmp_path / "spool"
+    submission_spool = spool.SubmissionSpool(str(directory))
+    submission_spool.add(make_submission(rr_job, 1), roots[0])
+
+    with submission_spool._lock():
+        with pytest.raises(spool.SpoolLockedError):
+            submission_spool.flush(submit=Submitter())
+
+    assert not os.path.exists(str(directory / ".lock"))
+    assert len(submission_spool.flush(submit=Submitter())) == 1
+
+
+def test_incomplete_entry_is_not_flushed(spool, rr_job, tmp_path, roots):
+    directory = tmp_path / "spool"
+    submission_spool = spool.SubmissionSpool(str(directory))
+    path = submission_spool.add(make_submission(rr_job, 1), roots[0])
+    # metadata is written last, entry without it is not complete
+    os.remove(path[:-len(".xml")] + ".json")
+
+    assert submission_spool.flush(submit=Submitter()) == []
@@ -0,0 +1,89 @@
+"""Duplicate submission suppression by content hashes of jobs."""
+import json
+import time
+
+import pytest
+
+from conftest import load_package_module, make_submission
+
+
+@pytest.fixture(scope="module")
+def ledger():
+    return load_package_module("submission_ledger")
+
+
+def test_job_hashes(ledger, rr_job):
+    jobs = make_submission(rr_job, 2).Jobs
+    same = make_submission(rr_job, 2).Jobs
+    # volatile fields are not part of the hash
+    same[0].PreID = 5
+    same[0].rrEnvList["OTHER"] = "1"
+
+    hashes = ledger.get_job_hashes(jobs)
+    same_hashes = ledger.get_job_hashes(same)
+
+    assert hashes[id(jobs[0])] == same_hashes[id(same[0])]
+    assert hashes[id(jobs[0])] != hashes[id(jobs[1])]
+
+    same[0].SeqEnd = 1200
+    assert ledger.get_job_hashes(same)[id(same[0])] != hashes[id(jobs[0])]
+
+
+def test_job_hash_covers_dependencies(ledger, rr_job):
+    render, publish = make_submission(rr_job, 2).Jobs
+    other_render, other_publish = make_submission(rr_job, 2).Jobs
+    other_render.SeqStart = 1
+    publish.add_dependencies(render)
+    other_publish.add_dependencies(other_render)
+
+    assert (
+        ledger.get_job_hashes([publish])[id(publish)]
+        != ledger.get_job_hashes([other_publish])[id(other_publish)]
+    )
+
+
+def test_skippable_jobs(ledger, rr_job):
+    render_a, render_b, publish = make_submission(rr_job, 3).Jobs
+    publish.add_dependencies(render_a)
+    jobs = [render_a, render_b, publish]
+
+    # duplicate render waited for by submitted job is submitted again
+    skipped = ledger.get_skippable_jobs(jobs, [render_a, render_b])
+    assert skipped == [render_b]
+
+    skipped = ledger.get_skippable_jobs(jobs, [render_a, publish])
+    assert skipped == [render_a, publish]
+
+
+def test_ledger(ledger, tmp_path):
+    path = str(tmp_path / "ledger" / "submission_ledger.json")
+    submissions = ledger.SubmissionLedger(60, path)
+
+    assert submissions.get_submitted(["a", "b"]) == set()
+    submissions.record(["a"])
+    assert submissions.get_submitted(["a", "b"]) == {"a"}
+    assert ledger.SubmissionLedger(60, path).get_submitted(["a"]) == {"a"}
+
+
+def test_ledger_forgets_expired(ledger, tmp_path):
+    path = str(tmp_path / "submission_ledger.json")
+    with open(path, "w") as stream:
+        json.dump({"old": time.time() - 120, "new": time.time()}, stream)
+    submissions = ledger.SubmissionLedger(60, path)
+
+    assert submissions.get_submitted(["old", "new"]) == {"new"}
+
+    submissions.record(["other"])
+    with open(path) as stream:
+        assert set(json.load(stream)) == {"new", "other"}
+
+
+def test_invalid_ledger_is_ignored(ledger, tmp_path):
+    path = str(tmp_path / "submission_ledger.json")
+    with open(path, "w") as stream:
+        stream.write("not json")
+    submissions = ledger.SubmissionLedger(60, path)
+
+    assert submissions.get_submitted(["a"]) == set()
+    submissions.record(["a"])
+    assert submissions.get_submitted(["a"]) == {"a"}